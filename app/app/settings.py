@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'drf_spectacular',
     'rest_framework.authtoken',
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,16 +83,78 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+# DB_CONN_MAX_AGE keeps connections open between requests for that many
+# seconds; 0 closes them after every request and 'none' never does.
+# DB_CONN_HEALTH_CHECKS pings a reused connection before each request,
+# see core.db. Set DB_POOLED when DB_HOST/DB_PORT point at a transaction
+# pooler such as PgBouncer, which cannot hold server-side cursors.
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '0')
+DB_POOLED = os.environ.get('DB_POOLED', '').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': (
+            None if DB_CONN_MAX_AGE.lower() == 'none'
+            else int(DB_CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'DB_CONN_HEALTH_CHECKS', '').lower() in ('1', 'true', 'yes'),
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOLED,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+# Read replica. Set DB_REPLICA_HOST to serve reads of GET, HEAD and
+# OPTIONS requests from it, see core.db.ReplicaRouter; other settings are
+# shared with the primary. Without it the alias is defined but unused.
+# A client that writes reads from the primary for READ_YOUR_WRITES_SECONDS
+# afterwards; point READ_YOUR_WRITES_CACHE at a shared cache so this
+# holds across worker processes.
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'HOST': DB_REPLICA_HOST or DATABASES['default']['HOST'],
+    'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+    'TEST': {'NAME': f'test_{DATABASES["default"]["NAME"]}_replica'},
+}
+REPLICA_DATABASES = ['replica'] if DB_REPLICA_HOST else []
+DATABASE_ROUTERS = ['core.db.ReplicaRouter']
+READ_YOUR_WRITES_SECONDS = int(os.environ.get('READ_YOUR_WRITES_SECONDS', 10))
+READ_YOUR_WRITES_CACHE = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Point AUTH_TOKEN_CACHE_BACKEND at a shared cache (e.g. Memcached) so
+# token invalidation reaches every worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'auth_tokens': {
+        'BACKEND': os.environ.get(
+            'AUTH_TOKEN_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('AUTH_TOKEN_CACHE_LOCATION', 'auth-tokens'),
+        'TIMEOUT': int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(
+                os.environ.get('AUTH_TOKEN_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+AUTH_TOKEN_CACHE = 'auth_tokens'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
@@ -131,6 +196,18 @@ MEDIA_URL = '/static/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Media is served by post.views.MediaView after an access check. Set
+# MEDIA_ACCEL to 'nginx' to have the proxy send the file from an internal
+# location, e.g.
+#   location /protected-media/ { internal; alias /vol/web/media/; }
+# or to 'sendfile' for servers honouring X-Sendfile.
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_SECONDS = 365 * 24 * 60 * 60
+# Files are stored before the post referring to them commits, so unused
+# media younger than this is never deleted.
+MEDIA_GRACE_SECONDS = int(os.environ.get('MEDIA_GRACE_SECONDS', 24 * 60 * 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -140,8 +217,55 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # core.renderers.ORJSONRenderer renders faster; it only formats some
+    # floats differently, see its docstring.
+    'DEFAULT_RENDERER_CLASSES': [
+        os.environ.get(
+            'API_JSON_RENDERER', 'rest_framework.renderers.JSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Threads per process for work done outside the request, see core.tasks.
+# 0 runs tasks inline.
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', 2))
+
+# Threads per process running the database work of the async views, see
+# post.async_views. This also caps their database connections. 0 runs
+# it on the request's own thread.
+ASYNC_DB_WORKERS = int(os.environ.get('ASYNC_DB_WORKERS', 16))
+
+# Limits for post image uploads, enforced while the upload streams in
+POST_IMAGE_MAX_BYTES = int(
+    os.environ.get('POST_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+POST_IMAGE_MAX_PIXELS = int(
+    os.environ.get('POST_IMAGE_MAX_PIXELS', 40_000_000))
+
+# Cursor pagination for the post list endpoint
+POST_PAGE_SIZE = int(os.environ.get('POST_PAGE_SIZE', 50))
+POST_MAX_PAGE_SIZE = int(os.environ.get('POST_MAX_PAGE_SIZE', 500))
+
+# Community feed, see post.feed. Posts of authors with more followers
+# than FEED_FANOUT_MAX_FOLLOWERS are read from their table instead of
+# being copied into every follower's timeline. Following someone copies
+# their latest FEED_BACKFILL_POSTS posts.
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.environ.get('FEED_FANOUT_MAX_FOLLOWERS', 10000))
+FEED_BACKFILL_POSTS = int(os.environ.get('FEED_BACKFILL_POSTS', 50))
+
+# Largest number of operations accepted by the post batch endpoint
+POST_BATCH_MAX_OPERATIONS = int(
+    os.environ.get('POST_BATCH_MAX_OPERATIONS', 500))
+
+# Scrapers of /metrics, see core.metrics. Requests must come from one of
+# METRICS_ALLOWED_IPS (REMOTE_ADDR, so behind a proxy that is the proxy)
+# or send "Authorization: Bearer <METRICS_TOKEN>"; with neither set the
+# endpoint refuses everyone.
+METRICS_ALLOWED_IPS = [
+    ip for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip
+]
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
@@ -7,7 +7,9 @@ from drf_spectacular.views import (  # type:ignore
 from django.contrib import admin
 from django.conf import settings
 from django.urls import path, include
-from django.conf.urls.static import static
+
+from core.metrics import metrics_view
+from post.views import MediaView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -20,10 +22,11 @@ urlpatterns = [
 
     path('api/user/', include('user.urls')),
     path('api/post/', include('post.urls')),
-]
 
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT,
-    )
+    path('metrics', metrics_view, name='metrics'),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:name>',
+        MediaView.as_view(),
+        name='media',
+    ),
+]
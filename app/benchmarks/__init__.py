@@ -0,0 +1,14 @@
+"""
+Benchmarks for the API, run from the app directory:
+
+    python -m benchmarks.<name> --help
+"""
+import os
+
+
+def setup_django():
+    """Configure Django for a standalone benchmark process."""
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
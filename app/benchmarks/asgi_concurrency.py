@@ -0,0 +1,148 @@
+"""
+Throughput of the tag list under WSGI and ASGI at many open connections.
+
+Requests are driven in process, so no server is needed: WSGI through
+WSGIHandler on a pool of --threads worker threads, like a threaded
+server, and ASGI through the ASGI application with one coroutine per
+open connection, for both the sync viewset route and the async route.
+
+    python -m benchmarks.asgi_concurrency --connections 10 100 400
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import setup_django
+
+
+def summarize(mode, connections, timings, errors, elapsed):
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if timings else 0
+    print(f'{mode:<12} {connections:>6} {len(timings) / elapsed:>9.0f} '
+          f'{p95 * 1000:>9.1f} {errors:>7}')
+
+
+def run_wsgi(handler, path, authorization, connections, requests, threads):
+    """Serve requests from connections clients on a thread pool."""
+    environ = {'PATH_INFO': path, 'HTTP_AUTHORIZATION': authorization}
+    setup_testing_defaults(environ)
+
+    def one(_):
+        start = time.perf_counter()
+        response = handler(dict(environ), lambda status, headers: None)
+        b''.join(response)
+        response.close()
+        return response.status_code, time.perf_counter() - start
+
+    workers = min(connections, threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+async def asgi_request(app, path, authorization):
+    """Send one GET through the ASGI app, return status and latency."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'),
+                    (b'authorization', authorization.encode())],
+        'client': ('127.0.0.1', 50000), 'server': ('127.0.0.1', 80),
+    }
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return status[0], time.perf_counter() - start
+
+
+async def run_asgi(app, path, authorization, connections, requests):
+    """Serve requests from connections concurrent clients."""
+    queue = list(range(requests))
+    results = []
+
+    async def client():
+        while queue:
+            queue.pop()
+            results.append(await asgi_request(app, path, authorization))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--connections', type=int, nargs='+', default=[10, 100, 400])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument(
+        '--threads', type=int, default=32,
+        help='WSGI worker threads, like a threaded server.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.asgi import get_asgi_application
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    from core.models import Tag
+
+    user = get_user_model().objects.create_user(
+        email='benchmark@example.com', password='benchmark')
+    Tag.objects.bulk_create(
+        Tag(user=user, name=f'Tag {i}') for i in range(20))
+    authorization = f'Token {Token.objects.create(user=user).key}'
+    wsgi, asgi = WSGIHandler(), get_asgi_application()
+    # Failed requests are counted, not logged.
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    sync_path = reverse('post:tag-list')
+    async_path = reverse('post:async-tag-list')
+
+    print(f'{"mode":<12} {"conns":>6} {"req/s":>9} {"p95 ms":>9} '
+          f'{"errors":>7}')
+    try:
+        for connections in args.connections:
+            runs = {
+                'wsgi': lambda: run_wsgi(
+                    wsgi, sync_path, authorization, connections,
+                    args.requests, args.threads),
+                'asgi sync': lambda: asyncio.run(run_asgi(
+                    asgi, sync_path, authorization, connections,
+                    args.requests)),
+                'asgi async': lambda: asyncio.run(run_asgi(
+                    asgi, async_path, authorization, connections,
+                    args.requests)),
+            }
+            for mode, run in runs.items():
+                # Drop connections left behind by finished request threads.
+                gc.collect()
+                results, elapsed = run()
+                timings = [t for code, t in results if code == 200]
+                summarize(mode, connections, timings,
+                          len(results) - len(timings), elapsed)
+    finally:
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
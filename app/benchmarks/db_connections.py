@@ -0,0 +1,76 @@
+"""
+Per-request latency with and without database connection reuse.
+
+Sends authenticated tag list requests through the WSGI handler, so
+Django opens and closes connections exactly as it does when serving,
+with CONN_MAX_AGE=0, with persistent connections, and with persistent
+connections plus health checks.
+
+    python -m benchmarks.db_connections --requests 500
+"""
+import argparse
+import statistics
+import time
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks import setup_django
+
+
+MODES = {
+    'new connection': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False},
+    'persistent': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': False},
+    'persistent+check': {'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True},
+}
+
+
+def request_ms(handler, environ):
+    """Serve one request and return its latency in milliseconds."""
+    start = time.perf_counter()
+    response = handler(dict(environ), lambda status, headers: None)
+    b''.join(response)
+    response.close()
+    elapsed = (time.perf_counter() - start) * 1000
+    assert response.status_code == 200, response.status_code
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.authtoken.models import Token
+
+    user = get_user_model().objects.create_user(
+        email='benchmark@example.com', password='benchmark')
+    token = Token.objects.create(user=user)
+    environ = {
+        'PATH_INFO': reverse('post:tag-list'),
+        'HTTP_AUTHORIZATION': f'Token {token.key}',
+    }
+    setup_testing_defaults(environ)
+    handler = WSGIHandler()
+
+    print(f'{"mode":<18} {"mean ms":>8} {"p50 ms":>8} {"p95 ms":>8}')
+    try:
+        for mode, settings in MODES.items():
+            connection.close()
+            connection.settings_dict.update(settings)
+            request_ms(handler, environ)
+            timings = sorted(
+                request_ms(handler, environ) for _ in range(args.requests))
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f'{mode:<18} {statistics.mean(timings):>8.2f} '
+                  f'{statistics.median(timings):>8.2f} {p95:>8.2f}')
+    finally:
+        connection.close()
+        user.delete()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Time to serialize and render the post list.
+
+Compares PostSerializer(many=True) with the compiled values() reader
+behind the list endpoints, each rendered by JSONRenderer and by
+ORJSONRenderer. Rows are created in a transaction that is rolled back,
+so any database configured in the environment can be used.
+
+    python -m benchmarks.list_serialization --sizes 100 1000 10000
+"""
+import argparse
+import time
+
+from benchmarks import setup_django
+
+
+def best_of(repeat, func):
+    """Return the fastest of repeat runs of func, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--tags', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from core.models import Post, Tag
+    from core.renderers import ORJSONRenderer
+    from post.queries import optimize_post_queryset
+    from post.readers import ListReader
+    from post.serializers import PostSerializer
+
+    request = Request(APIRequestFactory().get('/api/post/posts/'))
+    context = {'request': request}
+    renderers = {'json': JSONRenderer(), 'orjson': ORJSONRenderer()}
+
+    print(f'{"posts":>7} {"path":<18} {"ms":>9} {"speedup":>8}')
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(
+            email='benchmark@example.com', password='benchmark')
+        tags = Tag.objects.bulk_create(
+            Tag(user=user, name=f'Tag {i}') for i in range(args.tags))
+
+        for size in args.sizes:
+            existing = Post.objects.filter(user=user).count()
+            posts = Post.objects.bulk_create(
+                Post(user=user, title=f'Post {i}', content='Content ' * 20)
+                for i in range(existing, size)
+            )
+            Post.tags.through.objects.bulk_create(
+                Post.tags.through(post_id=post.id, tag_id=tag.id)
+                for post in posts for tag in tags
+            )
+            queryset = Post.objects.filter(user=user).order_by('-id')
+
+            def serializer_data():
+                return PostSerializer(
+                    optimize_post_queryset(queryset, PostSerializer),
+                    many=True, context=context,
+                ).data
+
+            def reader_data():
+                reader = ListReader.compile(
+                    PostSerializer(context=context))
+                return reader.read(reader.values(queryset))
+
+            expected = JSONRenderer().render(serializer_data())
+            assert ORJSONRenderer().render(reader_data()) == expected
+
+            baseline = None
+            for path, build in [('serializer', serializer_data),
+                                ('reader', reader_data)]:
+                for name, renderer in renderers.items():
+                    elapsed = best_of(
+                        args.repeat, lambda: renderer.render(build()))
+                    baseline = baseline or elapsed
+                    print(f'{size:>7} {path + "+" + name:<18} '
+                          f'{elapsed:>9.1f} {baseline / elapsed:>7.1f}x')
+
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
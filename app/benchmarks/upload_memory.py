@@ -0,0 +1,133 @@
+"""
+Peak memory per concurrent post image upload.
+
+Compares Django's default upload handlers plus the stock DRF ImageField
+with BoundedUploadHandler plus HeaderValidatedImageField. Each path runs
+in a fresh process, so its peak RSS is measured from a clean baseline.
+All uploads are held open together, like requests in flight at once.
+
+    python -m benchmarks.upload_memory --uploads 16 --size-mb 2
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import resource
+import tempfile
+import threading
+
+from PIL import Image
+
+from benchmarks import setup_django
+
+
+BOUNDARY = 'BenchmarkBoundary'
+
+
+class MultipartBody:
+    """File-like multipart body streaming one image from disk."""
+
+    def __init__(self, path):
+        self.head = (
+            f'--{BOUNDARY}\r\n'
+            'Content-Disposition: form-data; name="image"; '
+            'filename="upload.png"\r\n'
+            'Content-Type: image/png\r\n\r\n'
+        ).encode()
+        self.tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+        self.image = open(path, 'rb')
+        self.length = len(self.head) + os.path.getsize(path) + len(self.tail)
+
+    def read(self, size=-1):
+        chunk = b''
+        if self.head:
+            chunk, self.head = self.head, b''
+            return chunk
+        chunk = self.image.read(size)
+        if chunk:
+            return chunk
+        chunk, self.tail = self.tail, b''
+        return chunk
+
+
+def make_image(path, size_bytes):
+    """Write an incompressible RGB PNG of roughly size_bytes."""
+    side = int(math.sqrt(size_bytes / 3))
+    bands = [Image.effect_noise((side, side), 128) for _ in range(3)]
+    Image.merge('RGB', bands).save(path, format='PNG')
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_uploads(mode, path, uploads, results):
+    """Parse and validate uploads concurrently, report RSS growth."""
+    setup_django()
+    from django.core.files.uploadhandler import (
+        MemoryFileUploadHandler, TemporaryFileUploadHandler)
+    from django.http.multipartparser import MultiPartParser
+    from rest_framework import serializers
+
+    from post.uploads import BoundedUploadHandler, HeaderValidatedImageField
+
+    baseline = peak_rss_kb()
+    held = threading.Barrier(uploads)
+
+    def upload():
+        body = MultipartBody(path)
+        meta = {
+            'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+            'CONTENT_LENGTH': str(body.length),
+        }
+        if mode == 'stock':
+            handlers = [
+                MemoryFileUploadHandler(), TemporaryFileUploadHandler()]
+            field = serializers.ImageField()
+        else:
+            handlers = [BoundedUploadHandler(max_bytes=body.length)]
+            field = HeaderValidatedImageField()
+
+        _, files = MultiPartParser(meta, body, handlers, 'utf-8').parse()
+        image = field.to_internal_value(files['image'])
+        held.wait()
+        image.close()
+        body.image.close()
+
+    threads = [threading.Thread(target=upload) for _ in range(uploads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results[mode] = peak_rss_kb() - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--uploads', type=int, default=16)
+    parser.add_argument('--size-mb', type=float, default=2.0)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Manager().dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'upload.png')
+        make_image(path, int(args.size_mb * 1024 * 1024))
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        for mode in ('stock', 'streaming'):
+            process = ctx.Process(
+                target=run_uploads, args=(mode, path, args.uploads, results))
+            process.start()
+            process.join()
+
+    print(f'{args.uploads} concurrent uploads of {size_mb:.1f} MiB')
+    print(f'{"path":<10} {"peak RSS growth":>16} {"per upload":>12}')
+    for mode in ('stock', 'streaming'):
+        growth = results[mode] / 1024
+        print(f'{mode:<10} {growth:>12.1f} MiB '
+              f'{growth / args.uploads:>8.2f} MiB')
+
+
+if __name__ == '__main__':
+    main()
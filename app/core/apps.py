@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.db import close_unusable_connections
+        from core.metrics import install_query_recorder
+        request_started.connect(close_unusable_connections)
+        connection_created.connect(install_query_recorder)
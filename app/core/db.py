@@ -0,0 +1,90 @@
+"""
+Database connection helpers and replica routing.
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Set by core.middleware.ReplicaRoutingMiddleware for requests whose
+# reads may be served by a replica.
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def close_unusable_connections(**kwargs):
+    """Close persistent connections that fail a health check.
+
+    Backport of the CONN_HEALTH_CHECKS database setting from Django 4.1:
+    a connection kept open by CONN_MAX_AGE may have been dropped by the
+    server or a pooler while idle, so it is pinged before a request
+    reuses it and replaced on the next query if the ping fails.
+    """
+    for conn in connections.all():
+        if (conn.settings_dict.get('CONN_HEALTH_CHECKS')
+                and conn.connection is not None
+                and not conn.in_atomic_block
+                and not conn.is_usable()):
+            conn.close()
+
+
+class ReplicaRouter:
+    """Route reads of replica-safe requests to REPLICA_DATABASES.
+
+    Everything else, writes included, goes to the primary. Replicas hold
+    the same data, so relations between aliases are allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.REPLICA_DATABASES:
+            return random.choice(settings.REPLICA_DATABASES)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or instances read from a replica would be saved there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+@contextmanager
+def replica_reads(enabled):
+    """Allow or forbid reads from a replica inside the block."""
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+def _pin_key(credential):
+    digest = hashlib.sha256(credential.encode()).hexdigest()
+    return f'primary-pin:{digest}'
+
+
+def pin_to_primary(credential):
+    """Read from the primary for credential for READ_YOUR_WRITES_SECONDS."""
+    caches[settings.READ_YOUR_WRITES_CACHE].set(
+        _pin_key(credential), True, settings.READ_YOUR_WRITES_SECONDS)
+
+
+def is_pinned_to_primary(credential):
+    """Return whether credential wrote within READ_YOUR_WRITES_SECONDS."""
+    return caches[settings.READ_YOUR_WRITES_CACHE].get(
+        _pin_key(credential), False)
+
+
+async def apin_to_primary(credential):
+    """Async version of pin_to_primary."""
+    await caches[settings.READ_YOUR_WRITES_CACHE].aset(
+        _pin_key(credential), True, settings.READ_YOUR_WRITES_SECONDS)
+
+
+async def ais_pinned_to_primary(credential):
+    """Async version of is_pinned_to_primary."""
+    return await caches[settings.READ_YOUR_WRITES_CACHE].aget(
+        _pin_key(credential), False)
@@ -0,0 +1,113 @@
+"""
+Command for measuring API latency and queries per request
+"""
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Post
+
+
+def percentile(sorted_values, pct):
+    """Return the pct percentile of sorted_values, nearest rank."""
+    index = max(0, round(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+class Command(BaseCommand):
+    """Commands: benchmark the post and user API"""
+    help = (
+        'Drive the post and user endpoints through the test client as one '
+        'user and report latency percentiles and queries per request. '
+        'Run seed_data first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--email',
+            help='User to authenticate as; default the one with most posts.')
+
+    def _get_user(self, email):
+        User = get_user_model()
+        if email:
+            try:
+                return User.objects.get(email=email)
+            except User.DoesNotExist:
+                raise CommandError(f'No user {email}.')
+
+        busiest = (
+            Post.objects.values('user_id')
+            .annotate(posts=Count('id')).order_by('-posts').first()
+        )
+        if busiest is None:
+            raise CommandError('No posts found; run seed_data first.')
+        return User.objects.get(id=busiest['user_id'])
+
+    def _endpoints(self, user):
+        post = Post.objects.filter(user=user).order_by('-id').first()
+        if post is None:
+            raise CommandError(
+                'User has no posts to benchmark; run seed_data first.')
+        word = post.title.split()[0] if post.title else 'post'
+        post_list = reverse('post:post-list')
+        return [
+            ('post list', post_list),
+            ('post list fields', f'{post_list}?fields=id,title'),
+            ('post search', f'{post_list}?search={word}'),
+            ('post detail', reverse('post:post-detail', args=[post.id])),
+            ('tag list', reverse('post:tag-list')),
+            ('user me', reverse('user:me')),
+        ]
+
+    def handle(self, *args, **options):
+        user = self._get_user(options['email'])
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.stdout.write(
+            f'{options["requests"]} requests per endpoint as {user.email}')
+        self.stdout.write(
+            f'{"endpoint":<18} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} '
+            f'{"queries":>8}')
+
+        # The test client sends Host: testserver.
+        allowed_hosts = override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'])
+        with allowed_hosts:
+            self._run(client, user, options)
+
+    def _run(self, client, user, options):
+        for name, url in self._endpoints(user):
+            for _ in range(options['warmup']):
+                client.get(url)
+
+            timings, queries = [], []
+            for _ in range(options['requests']):
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    res = client.get(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+                if res.status_code != 200:
+                    raise CommandError(
+                        f'{name} returned {res.status_code}: {url}')
+                queries.append(len(ctx.captured_queries))
+
+            timings.sort()
+            self.stdout.write(
+                f'{name:<18} {percentile(timings, 50):>8.2f} '
+                f'{percentile(timings, 95):>8.2f} '
+                f'{percentile(timings, 99):>8.2f} '
+                f'{statistics.mean(queries):>8.1f}')
@@ -0,0 +1,93 @@
+"""
+Command for moving existing post images to content-addressed names
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import POST_IMAGE_FIELDS, Post
+from core.storage import (
+    content_name, file_digest, image_extension, is_content_name,
+    post_image_storage)
+
+
+class Command(BaseCommand):
+    """Commands: rename post images by content hash in id-ordered chunks"""
+    help = (
+        'Store post images saved under random names by their content hash, '
+        'so identical files are kept once, and remove the old copies.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Number of posts handled per transaction.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report the files that would be merged without changes.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        # Names a dry run has handled and content names it would create.
+        self.seen = set()
+        last_id = 0
+        moved = merged = missing = 0
+
+        while True:
+            rows = list(
+                Post.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', *POST_IMAGE_FIELDS)[:options['chunk_size']]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            names = sorted({
+                name for row in rows for name in row[1:]
+                if name and not is_content_name(name)
+            })
+
+            renamed = {}
+            for name in names:
+                if name in self.seen:
+                    continue  # Dry run, counted for an earlier chunk.
+                if not post_image_storage.exists(name):
+                    self.stderr.write(f'{name}: file missing, skipped')
+                    missing += 1
+                    continue
+                new_name, duplicate = self._store(name)
+                renamed[name] = new_name
+                merged += duplicate
+                moved += not duplicate
+
+            if renamed and not self.dry_run:
+                with transaction.atomic():
+                    for name, new_name in renamed.items():
+                        for field in POST_IMAGE_FIELDS:
+                            Post.objects.filter(**{field: name}).update(
+                                **{field: new_name})
+                for name in renamed:
+                    # Kept if uploaded within MEDIA_GRACE_SECONDS.
+                    post_image_storage.delete(name)
+
+        verb = 'would be' if self.dry_run else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f'{moved} files {verb} renamed and {merged} merged into '
+            f'identical ones; {missing} missing.'))
+
+    def _store(self, name):
+        """Store file name by content; return the name and if it existed."""
+        with post_image_storage.open(name) as content:
+            digest = file_digest(content)
+            content.seek(0)
+            new_name = content_name(name, digest, image_extension(content))
+            duplicate = (
+                new_name in self.seen or post_image_storage.exists(new_name))
+            if self.dry_run:
+                self.seen.update((name, new_name))
+            else:
+                post_image_storage.save(name, content)
+        if self.verbosity > 1:
+            self.stdout.write(f'{name} -> {new_name}')
+        return new_name, duplicate
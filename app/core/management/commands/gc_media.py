@@ -0,0 +1,91 @@
+"""
+Command for deleting post images no post refers to
+"""
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import POST_IMAGE_DIR, POST_IMAGE_FIELDS, Post
+from core.storage import post_image_storage
+
+
+class Command(BaseCommand):
+    """Commands: delete unreferenced post images chunk by chunk"""
+    help = (
+        'Delete files in the post image directory that no post refers to '
+        'and that are older than the grace period.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of files checked per query.',
+        )
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GRACE_SECONDS,
+            help='Keep files modified less than this many seconds ago.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report unreferenced files without deleting them.',
+        )
+
+    def handle(self, *args, **options):
+        grace = options['grace']
+        dry_run = options['dry_run']
+        verbosity = options['verbosity']
+        checked = found = freed = 0
+
+        for chunk in self._old_files(options['chunk_size'], grace):
+            checked += len(chunk)
+            referenced = self._referenced(name for name, _ in chunk)
+            for name, size in chunk:
+                if name in referenced:
+                    continue
+                # Checked again under lock, the file may have been reused.
+                if dry_run or post_image_storage.delete_unused(name, grace):
+                    found += 1
+                    freed += size
+                    if verbosity > 1:
+                        self.stdout.write(f'{name}: {size} bytes')
+
+        verb = 'would be' if dry_run else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} files, {found} unreferenced {verb} deleted '
+            f'({freed} bytes).'))
+
+    def _old_files(self, chunk_size, grace):
+        """Yield sorted chunks of (name, size) of files older than grace.
+
+        The directory is read lazily, so only one chunk is held at once.
+        """
+        cutoff = time.time() - grace
+        try:
+            entries = os.scandir(post_image_storage.path(POST_IMAGE_DIR))
+        except FileNotFoundError:
+            return
+        with entries:
+            files = (
+                (entry.name, entry.stat())
+                for entry in entries if entry.is_file(follow_symlinks=False)
+            )
+            old = (
+                (f'{POST_IMAGE_DIR}/{name}', stat.st_size)
+                for name, stat in files if stat.st_mtime < cutoff
+            )
+            while chunk := sorted(islice(old, chunk_size)):
+                yield chunk
+
+    def _referenced(self, names):
+        """Return which of names a post image column refers to."""
+        names = list(names)
+        referenced = set()
+        for field in POST_IMAGE_FIELDS:
+            # One index lookup per name, see post_image_idx and siblings.
+            referenced.update(
+                Post.objects.filter(**{f'{field}__in': names})
+                .values_list(field, flat=True).distinct())
+        return referenced
@@ -0,0 +1,174 @@
+"""
+Command for importing users from a CSV or NDJSON file
+"""
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_csv(stream):
+    """Yield (line number, record) for each row of a CSV with a header."""
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def read_ndjson(stream):
+    """Yield (line number, record) for each JSON object line."""
+    for line_num, line in enumerate(stream, 1):
+        if line.strip():
+            try:
+                yield line_num, json.loads(line)
+            except ValueError:
+                yield line_num, None
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+class Command(BaseCommand):
+    """Commands: bulk create users with passwords hashed in parallel"""
+    help = (
+        'Create users from a CSV file with email, name and password '
+        'columns, or from NDJSON objects with those keys. Existing emails '
+        'are skipped, so an interrupted import can be run again.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, '-' for stdin.")
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='File format; default from the file extension.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Users hashed and inserted together.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Password hashing processes; 0 hashes in this process.')
+
+    def _records(self, stream, file_format):
+        """Yield normalized user fields, skipping invalid records."""
+        User = get_user_model()
+        for line_num, record in READERS[file_format](stream):
+            if not isinstance(record, dict):
+                record = {}
+            email = User.objects.normalize_email(
+                str(record.get('email') or '').strip())
+            name = str(record.get('name') or '')
+            try:
+                if not email:
+                    raise ValidationError('No email.')
+                User._meta.get_field('email').run_validators(email)
+                User._meta.get_field('name').run_validators(name)
+            except ValidationError as e:
+                self.invalid += 1
+                self.stderr.write(
+                    f'Line {line_num}: {" ".join(e.messages)} Skipped.')
+                continue
+            yield {
+                'email': email,
+                'name': name,
+                # A missing password leaves the account unusable until
+                # the user resets it.
+                'password': record.get('password') or None,
+            }
+
+    def _new_records(self, batch, pending):
+        """Drop records whose email exists or awaits insertion."""
+        emails, records = set(pending), []
+        for record in batch:
+            if record['email'] not in emails:
+                emails.add(record['email'])
+                records.append(record)
+        existing = set(
+            get_user_model().objects
+            .filter(email__in=[record['email'] for record in records])
+            .values_list('email', flat=True)
+        )
+        self.skipped += len(batch) - len(records) + len(existing)
+        return [
+            record for record in records if record['email'] not in existing
+        ]
+
+    def _insert(self, records, hashes):
+        if not records:
+            return
+        User = get_user_model()
+        User.objects.bulk_create(
+            User(email=record['email'], name=record['name'], password=hashed)
+            for record, hashed in zip(records, hashes)
+        )
+        self.imported += len(records)
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(
+            f'Imported {self.imported} users '
+            f'({self.imported / elapsed:.0f} users/s)')
+
+    def _import(self, stream, file_format, batch_size, hash_passwords):
+        records = self._records(stream, file_format)
+        pending = None
+        while batch := list(islice(records, batch_size)):
+            batch = self._new_records(
+                batch, [r['email'] for r in pending[0]] if pending else [])
+            # Hashing of this batch overlaps the insert of the last one.
+            hashes = hash_passwords([r['password'] for r in batch])
+            if pending:
+                self._insert(*pending)
+            pending = (batch, hashes)
+        if pending:
+            self._insert(*pending)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = os.path.splitext(path)[1].lstrip('.').lower()
+            if file_format not in READERS:
+                raise CommandError(
+                    'Cannot tell the format from the file name; '
+                    'pass --format.')
+
+        batch_size = options['batch_size']
+        workers = options['workers']
+        self.imported = self.skipped = self.invalid = 0
+        self.start = time.perf_counter()
+        try:
+            stream = (
+                nullcontext(sys.stdin) if path == '-'
+                else open(path, newline='', encoding='utf-8'))
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+        with stream as stream:
+            if not workers:
+                self._import(
+                    stream, file_format, batch_size,
+                    lambda passwords: map(make_password, passwords))
+            else:
+                with ProcessPoolExecutor(
+                        max_workers=workers, initializer=django.setup
+                ) as pool:
+                    # map() submits the whole batch at once and yields
+                    # the hashes in order.
+                    self._import(
+                        stream, file_format, batch_size,
+                        lambda passwords: pool.map(
+                            make_password, passwords,
+                            chunksize=max(1, len(passwords) // workers)))
+
+        elapsed = time.perf_counter() - self.start
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {self.imported} users in {elapsed:.1f}s '
+            f'({self.imported / elapsed:.0f} users/s); skipped '
+            f'{self.skipped} existing and {self.invalid} invalid records.'))
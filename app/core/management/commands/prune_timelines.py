@@ -0,0 +1,51 @@
+"""
+Command for removing feed entries of deleted posts
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+
+from core.models import Post, TimelineEntry
+
+
+class Command(BaseCommand):
+    """Commands: delete dangling timeline entries in id-ordered chunks"""
+    help = (
+        'Delete timeline entries whose post no longer exists, e.g. after '
+        'users were deleted, one chunk per statement.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=10000,
+            help='Number of entries checked per statement.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Count dangling entries without deleting them.',
+        )
+
+    def handle(self, *args, **options):
+        last_id = 0
+        checked = dangling = 0
+
+        while True:
+            ids = list(
+                TimelineEntry.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:options['chunk_size']]
+            )
+            if not ids:
+                break
+
+            entries = TimelineEntry.objects.filter(id__in=ids).exclude(
+                Exists(Post.objects.filter(id=OuterRef('post_id'))))
+            if options['dry_run']:
+                dangling += entries.count()
+            else:
+                dangling += entries.delete()[0]
+            checked += len(ids)
+            last_id = ids[-1]
+
+        verb = 'dangling' if options['dry_run'] else 'deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} timeline entries, {dangling} {verb}.'))
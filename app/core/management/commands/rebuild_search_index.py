@@ -0,0 +1,43 @@
+"""
+Command for rebuilding the post full-text search index
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import Post
+
+
+class Command(BaseCommand):
+    """Commands: recompute Post.search_vector in id-ordered chunks"""
+    help = (
+        'Recompute the search vector of every post, one chunk per '
+        'transaction, e.g. after adding the column to existing rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of posts updated per statement.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        total = 0
+
+        while True:
+            ids = list(
+                Post.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+
+            # Clearing the vector makes the trigger recompute it.
+            total += Post.objects.filter(
+                id__gte=ids[0], id__lte=ids[-1]
+            ).update(search_vector=None)
+            last_id = ids[-1]
+            self.stdout.write(f'Reindexed {total} posts (up to id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {total} posts.'))  # noqa
@@ -0,0 +1,73 @@
+"""
+Command for correcting drift in Tag.post_count
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import Post, Tag
+
+
+class Command(BaseCommand):
+    """Commands: recount tag links in id-ordered chunks"""
+    help = (
+        'Recount the posts of every tag and fix counters that drifted, '
+        'one chunk per transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of tags checked per transaction.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drifted tags without fixing them.',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        links = Subquery(
+            Post.tags.through.objects.filter(tag_id=OuterRef('id'))
+            .values('tag_id').annotate(links=Count('id')).values('links'),
+            output_field=IntegerField(),
+        )
+        last_id = 0
+        checked = fixed = 0
+
+        while True:
+            with transaction.atomic():
+                # Locking the tags holds back the count triggers of
+                # concurrent link changes until the recount commits.
+                ids = list(
+                    Tag.objects.filter(id__gt=last_id)
+                    .order_by('id')
+                    .select_for_update()
+                    .values_list('id', flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+
+                drifted = [
+                    (tag.id, tag.post_count, tag.actual)
+                    for tag in Tag.objects.filter(id__in=ids)
+                    .annotate(actual=Coalesce(links, 0))
+                    .only('id', 'post_count')
+                    if tag.post_count != tag.actual
+                ]
+                if drifted and not options['dry_run']:
+                    Tag.objects.filter(
+                        id__in=[tag_id for tag_id, _, _ in drifted]
+                    ).update(post_count=Coalesce(links, 0))
+
+            for tag_id, counted, actual in drifted:
+                self.stdout.write(
+                    f'Tag {tag_id}: post_count {counted}, {actual} posts')
+            checked += len(ids)
+            fixed += len(drifted)
+            last_id = ids[-1]
+
+        verb = 'drifted' if options['dry_run'] else 'fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {checked} tags, {fixed} {verb}.'))
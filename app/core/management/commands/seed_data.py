@@ -0,0 +1,105 @@
+"""
+Command for generating users, posts and tags at scale
+"""
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Post, Tag
+
+
+WORDS = (
+    'river city garden light market winter coffee bridge station music '
+    'harbor forest morning paper window engine valley street summer cloud '
+    'bakery lantern island museum signal canvas meadow tunnel orchard '
+    'library'
+).split()
+
+
+class Command(BaseCommand):
+    """Commands: bulk create deterministic sample data"""
+    help = (
+        'Bulk create users with posts, tags and tag links. The same seed '
+        'produces the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--posts-per-user', type=int, default=100)
+        parser.add_argument('--tags-per-user', type=int, default=20)
+        parser.add_argument('--tags-per-post', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--password', default='password',
+            help='Password of every generated user.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Rows per INSERT statement.')
+
+    def _words(self, rng, count):
+        return ' '.join(rng.choices(WORDS, k=count))
+
+    def handle(self, *args, **options):
+        if options['tags_per_post'] > options['tags_per_user']:
+            raise CommandError('--tags-per-post exceeds --tags-per-user.')
+
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        User = get_user_model()
+        emails = [
+            f'seed{options["seed"]}-user{i}@example.com'
+            for i in range(options['users'])
+        ]
+        if User.objects.filter(email__in=emails).exists():
+            raise CommandError(
+                f'Data for seed {options["seed"]} already exists.')
+
+        # Hash once: the hasher is deliberately slow.
+        password = make_password(options['password'])
+        posts_total = 0
+        with transaction.atomic():
+            users = User.objects.bulk_create(
+                [User(email=email, name=f'Seed User {i}', password=password)
+                 for i, email in enumerate(emails)],
+                batch_size=batch_size,
+            )
+            tags = Tag.objects.bulk_create(
+                [Tag(user=user, name=f'{WORDS[j % len(WORDS)]} {j}')
+                 for user in users
+                 for j in range(options['tags_per_user'])],
+                batch_size=batch_size,
+            )
+            tags_by_user = {}
+            for tag in tags:
+                tags_by_user.setdefault(tag.user_id, []).append(tag.id)
+
+            for user in users:
+                for start in range(
+                        0, options['posts_per_user'], batch_size):
+                    count = min(
+                        batch_size, options['posts_per_user'] - start)
+                    posts = Post.objects.bulk_create(
+                        Post(
+                            user=user,
+                            title=self._words(rng, 4).capitalize(),
+                            content=self._words(rng, rng.randint(20, 80)),
+                        )
+                        for _ in range(count)
+                    )
+                    Post.tags.through.objects.bulk_create(
+                        [Post.tags.through(post_id=post.id, tag_id=tag_id)
+                         for post in posts
+                         for tag_id in rng.sample(
+                             tags_by_user.get(user.id, []),
+                             options['tags_per_post'])],
+                        batch_size=batch_size,
+                    )
+                    posts_total += count
+                self.stdout.write(f'Created {posts_total} posts')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users, {len(tags)} tags and '
+            f'{posts_total} posts.'))
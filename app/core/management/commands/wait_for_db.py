@@ -5,23 +5,65 @@ import time
 
 from psycopg2 import OperationalError as Psycopg2OpError  # type: ignore
 
+from django.db import DEFAULT_DB_ALIAS
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Commands: wait for DB"""
+    help = (
+        'Wait for the database with exponential backoff. With --probe, '
+        'check once and exit non-zero if it is unavailable.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database alias to check.')
+        parser.add_argument(
+            '--timeout', type=float, default=0,
+            help='Give up after this many seconds; 0 waits forever.')
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failure.')
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Upper bound for the delay between attempts.')
+        parser.add_argument(
+            '--probe', action='store_true',
+            help='Check once, for use as a readiness probe.')
+
+    def _database_up(self, database):
+        try:
+            self.check(databases=[database])
+        except (Psycopg2OpError, OperationalError):
+            return False
+        return True
 
     def handle(self, *args, **options):
+        database = options['database']
+        if options['probe']:
+            if not self._database_up(database):
+                raise CommandError('Database unavailable.')
+            return
+
         self.stdout.write('Waiting for DB connection..')
-        db_up = False
-
-        while db_up is False:
-            try:
-                self.check(databases=['default'])
-                db_up = True
-            except (Psycopg2OpError, OperationalError):
-                self.stdout.write(self.style.WARNING('Database Connection failed, reconnecting in 1 sec..'))  # noqa
-                time.sleep(1)
+        deadline = None
+        if options['timeout']:
+            deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+
+        while not self._database_up(database):
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {options["timeout"]}s.')
+                delay = min(delay, remaining)
+            self.stdout.write(self.style.WARNING(
+                f'Database Connection failed, reconnecting in {delay:.1f} sec..'))  # noqa
+            time.sleep(delay)
+            delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('DB connection stabilized.'))
@@ -0,0 +1,147 @@
+"""
+Per-view request metrics in the Prometheus format.
+
+MetricsMiddleware times each request and records its database queries
+through an execute wrapper installed on every connection; the counts
+reach the wrapper through a context variable, so queries an async view
+runs on its worker pool are counted too. Metrics are labelled with the
+view name, not the path, to keep their number bounded.
+
+Each process keeps its own values. Under gunicorn set
+PROMETHEUS_MULTIPROC_DIR to an empty directory before the workers start
+and point the child_exit server hook at worker_exit; /metrics then sums
+the values of every worker.
+
+/metrics is served on the API host, so it only answers scrapers listed
+in METRICS_ALLOWED_IPS or sending METRICS_TOKEN as a bearer token.
+"""
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Histogram,
+    generate_latest, multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling the request.',
+    ['method', 'view', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries run by the request.',
+    ['method', 'view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries run by the request.',
+    ['method', 'view'],
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Size of the response body.',
+    ['method', 'view'],
+    buckets=tuple(4 ** n for n in range(4, 13)),
+)
+
+_request_queries = ContextVar('request_queries', default=None)
+# Labelled children by (method, view, status); labels() takes a lock.
+_children = {}
+
+
+class QueryStats:
+    """Number and total duration of the queries a request ran."""
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper adding the query to the current request's stats."""
+    stats = _request_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver adding record_queries to connection."""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def start_request():
+    """Start collecting query stats; return them and a reset token."""
+    stats = QueryStats()
+    return stats, _request_queries.set(stats)
+
+
+def finish_request(request, response, stats, token, start):
+    """Stop collecting query stats and record the request."""
+    elapsed = time.perf_counter() - start
+    _request_queries.reset(token)
+
+    match = request.resolver_match
+    key = (
+        request.method,
+        match.view_name if match is not None else '<unmatched>',
+        response.status_code,
+    )
+    children = _children.get(key)
+    if children is None:
+        method, view, status = key
+        children = _children[key] = (
+            REQUEST_LATENCY.labels(method, view, status),
+            REQUEST_QUERIES.labels(method, view),
+            REQUEST_DB_TIME.labels(method, view),
+            RESPONSE_SIZE.labels(method, view),
+        )
+    latency, queries, db_time, size = children
+    latency.observe(elapsed)
+    queries.observe(stats.count)
+    db_time.observe(stats.duration)
+    if response.has_header('Content-Length'):
+        size.observe(int(response['Content-Length']))
+    elif not response.streaming:
+        size.observe(len(response.content))
+
+
+def scrape_allowed(request):
+    """Return whether request comes from an allowed metrics scraper."""
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    scheme, _, token = request.META.get(
+        'HTTP_AUTHORIZATION', '').partition(' ')
+    return (bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer'
+            and hmac.compare_digest(token, settings.METRICS_TOKEN))
+
+
+def metrics_view(request):
+    """Expose the metrics of every worker process for scraping."""
+    if not scrape_allowed(request):
+        return HttpResponseForbidden()
+    registry = REGISTRY
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+def worker_exit(server, worker):
+    """gunicorn child_exit hook dropping the files of a dead worker."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
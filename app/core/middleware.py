@@ -0,0 +1,91 @@
+"""
+Middleware for the project.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+
+from core.db import (
+    ais_pinned_to_primary, apin_to_primary, is_pinned_to_primary,
+    pin_to_primary, replica_reads)
+from core.metrics import finish_request, start_request
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Record latency, queries, database time and size of each request.
+
+    Runs natively in both sync and async chains, so async views keep
+    their event loop. List it first to time the whole middleware stack.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        stats, token = start_request()
+        response = self.get_response(request)
+        finish_request(request, response, stats, token, start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        stats, token = start_request()
+        response = await self.get_response(request)
+        finish_request(request, response, stats, token, start)
+        return response
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """Let safe requests read from replicas, except right after a write.
+
+    Clients are told apart by their Authorization header or session
+    cookie, as the view has not authenticated them yet. Any other
+    request pins the client's reads to the primary for
+    READ_YOUR_WRITES_SECONDS, so it sees its writes despite replication
+    lag. See core.db.ReplicaRouter.
+    """
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def _credential(self, request):
+        return (request.META.get('HTTP_AUTHORIZATION')
+                or request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+
+    def _may_use_replica(self, request):
+        return (bool(settings.REPLICA_DATABASES)
+                and request.method in self.safe_methods)
+
+    def _pin_credentials(self, request, response, credential):
+        """Return the credentials whose reads to pin after response."""
+        if request.method in self.safe_methods:
+            return []
+        credentials = [credential] if credential else []
+        # A login starts a new session; its first reads need the primary.
+        session = response.cookies.get(settings.SESSION_COOKIE_NAME)
+        if session is not None and session.value:
+            credentials.append(session.value)
+        return credentials
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        credential = self._credential(request)
+        use_replica = self._may_use_replica(request) and not (
+            credential and is_pinned_to_primary(credential))
+        with replica_reads(use_replica):
+            response = self.get_response(request)
+        for pinned in self._pin_credentials(request, response, credential):
+            pin_to_primary(pinned)
+        return response
+
+    async def __acall__(self, request):
+        # The pin cache may be remote; keep its round trips off the loop.
+        credential = self._credential(request)
+        use_replica = self._may_use_replica(request) and not (
+            credential and await ais_pinned_to_primary(credential))
+        with replica_reads(use_replica):
+            response = await self.get_response(request)
+        for pinned in self._pin_credentials(request, response, credential):
+            await apin_to_primary(pinned)
+        return response
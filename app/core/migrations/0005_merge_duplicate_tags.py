@@ -0,0 +1,43 @@
+# Generated by Django 4.0.10 on 2026-10-17 05:48
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_tags(apps, schema_editor):
+    """Point posts at the oldest of each duplicate tag and drop the rest."""
+    Tag = apps.get_model('core', 'Tag')
+    PostTag = apps.get_model('core', 'Post').tags.through
+
+    duplicates = (
+        Tag.objects.values('user_id', 'name')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for dup in duplicates.iterator():
+        extra_ids = list(
+            Tag.objects.filter(user_id=dup['user_id'], name=dup['name'])
+            .exclude(id=dup['keep_id'])
+            .values_list('id', flat=True)
+        )
+        post_ids = (
+            PostTag.objects.filter(tag_id__in=extra_ids)
+            .values_list('post_id', flat=True).distinct()
+        )
+        PostTag.objects.bulk_create(
+            [PostTag(post_id=post_id, tag_id=dup['keep_id'])
+             for post_id in post_ids],
+            ignore_conflicts=True,
+        )
+        Tag.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_post_image'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.0.10 on 2026-10-17 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_merge_duplicate_tags'),
+    ]
+
+    # The unique index is built without blocking writes, then attached as
+    # the constraint, which only takes a brief lock and no table scan.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                # Left behind INVALID by an interrupted build.
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS '
+                    'unique_tag_name_per_user;',
+                    migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY '
+                    'unique_tag_name_per_user ON core_tag (user_id, name);',
+                    migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE core_tag ADD CONSTRAINT '
+                    'unique_tag_name_per_user UNIQUE '
+                    'USING INDEX unique_tag_name_per_user;',
+                    'ALTER TABLE core_tag DROP CONSTRAINT '
+                    'unique_tag_name_per_user;',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='tag',
+                    constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.0.10 on 2026-10-17 05:50
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_tag_unique_name_per_user'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['user', '-id'], name='post_user_id_desc_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.0.10 on 2026-10-17 05:52
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+# Recompute the vector only when the text changes or it was cleared, so
+# saving an unchanged post (or a rebuild that sets NULL) stays cheap.
+CREATE_TRIGGER = """
+CREATE FUNCTION core_post_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.search_vector IS NOT NULL
+           AND NEW.title IS NOT DISTINCT FROM OLD.title
+           AND NEW.content IS NOT DISTINCT FROM OLD.content THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.content, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_post_search_vector
+    BEFORE INSERT OR UPDATE ON core_post
+    FOR EACH ROW EXECUTE FUNCTION core_post_search_vector_update();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS core_post_search_vector ON core_post;
+DROP FUNCTION IF EXISTS core_post_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    # Existing rows are filled by the rebuild_search_index command.
+    atomic = False
+
+    dependencies = [
+        ('core', '0007_post_user_id_desc_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        AddIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0008_post_search_vector'),
+    ]
+
+    # The auto-created through model cannot declare Meta.indexes, so the
+    # tag -> posts index is managed directly. Django's own tag_id index is
+    # kept: migration state still describes it, and dropping it by its
+    # generated name would leave state and schema disagreeing.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            'core_post_tags_tag_id_post_id_idx '
+            'ON core_post_tags (tag_id, post_id);',
+            'DROP INDEX CONCURRENTLY IF EXISTS '
+            'core_post_tags_tag_id_post_id_idx;',
+        ),
+    ]
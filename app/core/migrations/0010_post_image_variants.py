@@ -0,0 +1,24 @@
+# Generated by Django 4.0.10 on 2026-10-17 05:56
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_post_tags_tag_id_post_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_medium',
+            field=models.ImageField(editable=False, null=True, upload_to=core.models.post_image_path),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_thumbnail',
+            field=models.ImageField(editable=False, null=True, upload_to=core.models.post_image_path),
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 4.0.10 on 2026-10-17 06:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+# Statement level triggers bump each affected user once per statement, so
+# bulk writes cost one extra UPDATE rather than one per row.
+BUMP = """
+    UPDATE core_contentversion
+    SET version = version + 1, modified_at = clock_timestamp()
+    WHERE user_id IN ({users});
+    RETURN NULL;
+"""
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION core_content_version_create() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO core_contentversion (user_id, version, modified_at)
+    VALUES (NEW.id, 1, now())
+    ON CONFLICT (user_id) DO NOTHING;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_content_version_bump() RETURNS trigger AS $$
+BEGIN
+{BUMP.format(users='SELECT user_id FROM changed')}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_content_version_bump_post_tags() RETURNS trigger AS $$
+BEGIN
+{BUMP.format(users='SELECT p.user_id FROM changed c '
+                   'JOIN core_post p ON p.id = c.post_id')}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_user_content_version
+    AFTER INSERT ON core_user
+    FOR EACH ROW EXECUTE FUNCTION core_content_version_create();
+"""
+
+# Transition tables are only allowed on single-event triggers.
+for table, function, events in [
+    ('core_post', 'core_content_version_bump',
+     [('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')]),
+    ('core_tag', 'core_content_version_bump',
+     [('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')]),
+    ('core_post_tags', 'core_content_version_bump_post_tags',
+     [('INSERT', 'NEW'), ('DELETE', 'OLD')]),
+]:
+    for event, rows in events:
+        CREATE_TRIGGERS += f"""
+CREATE TRIGGER {table}_content_version_{event.lower()}
+    AFTER {event} ON {table}
+    REFERENCING {rows} TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS core_user_content_version ON core_user;
+DROP TRIGGER IF EXISTS core_post_content_version_insert ON core_post;
+DROP TRIGGER IF EXISTS core_post_content_version_update ON core_post;
+DROP TRIGGER IF EXISTS core_post_content_version_delete ON core_post;
+DROP TRIGGER IF EXISTS core_tag_content_version_insert ON core_tag;
+DROP TRIGGER IF EXISTS core_tag_content_version_update ON core_tag;
+DROP TRIGGER IF EXISTS core_tag_content_version_delete ON core_tag;
+DROP TRIGGER IF EXISTS core_post_tags_content_version_insert ON core_post_tags;
+DROP TRIGGER IF EXISTS core_post_tags_content_version_delete ON core_post_tags;
+DROP FUNCTION IF EXISTS core_content_version_create();
+DROP FUNCTION IF EXISTS core_content_version_bump();
+DROP FUNCTION IF EXISTS core_content_version_bump_post_tags();
+"""
+
+CREATE_EXISTING = """
+INSERT INTO core_contentversion (user_id, version, modified_at)
+SELECT id, 1, now() FROM core_user
+ON CONFLICT (user_id) DO NOTHING;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.BigIntegerField(default=1)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(CREATE_EXISTING, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 4.0.10 on 2026-10-17 06:44
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Statement level triggers apply one UPDATE per statement, adding each
+# tag's number of inserted or deleted links.
+ADJUST = """
+    UPDATE core_tag t
+    SET post_count = GREATEST(t.post_count {op} c.links, 0)
+    FROM (
+        SELECT tag_id, count(*) AS links FROM changed GROUP BY tag_id
+    ) c
+    WHERE t.id = c.tag_id;
+    RETURN NULL;
+"""
+
+# A count below the links removed has drifted; it is kept at 0 rather
+# than failing the delete, and reported.
+WARN_DRIFT = """
+    SELECT string_agg(t.id::text, ', ') INTO drifted
+    FROM core_tag t
+    JOIN (
+        SELECT tag_id, count(*) AS links FROM changed GROUP BY tag_id
+    ) c ON t.id = c.tag_id
+    WHERE t.post_count < c.links;
+    IF drifted IS NOT NULL THEN
+        RAISE WARNING 'post_count of tags % below their links; '
+            'run reconcile_tag_counts', drifted;
+    END IF;
+"""
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def count_existing(apps, schema_editor):
+    """Count the posts of existing tags, one batch per transaction."""
+    Tag = apps.get_model('core', 'Tag')
+    PostTag = apps.get_model('core', 'Post').tags.through
+    links = Subquery(
+        PostTag.objects.filter(tag_id=OuterRef('id'))
+        .values('tag_id').annotate(links=Count('id')).values('links'),
+        output_field=IntegerField(),
+    )
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Locking the tags holds back the count triggers of
+            # concurrent link changes until the batch commits.
+            ids = list(
+                Tag.objects.filter(id__gt=last_id).order_by('id')
+                .select_for_update()
+                .values_list('id', flat=True)[:BACKFILL_BATCH_SIZE]
+            )
+            if not ids:
+                break
+            Tag.objects.filter(id__in=ids).update(
+                post_count=Coalesce(links, 0))
+        last_id = ids[-1]
+
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION core_tag_post_count_add() RETURNS trigger AS $$
+BEGIN
+{ADJUST.format(op='+')}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_tag_post_count_remove() RETURNS trigger AS $$
+DECLARE
+    drifted text;
+BEGIN
+{WARN_DRIFT}
+{ADJUST.format(op='-')}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_post_tags_post_count_insert
+    AFTER INSERT ON core_post_tags
+    REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION core_tag_post_count_add();
+
+CREATE TRIGGER core_post_tags_post_count_delete
+    AFTER DELETE ON core_post_tags
+    REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION core_tag_post_count_remove();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS core_post_tags_post_count_insert ON core_post_tags;
+DROP TRIGGER IF EXISTS core_post_tags_post_count_delete ON core_post_tags;
+DROP FUNCTION IF EXISTS core_tag_post_count_add();
+DROP FUNCTION IF EXISTS core_tag_post_count_remove();
+"""
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and the
+    # backfill commits per batch so tags are never locked all at once.
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        # After the triggers, so links changed meanwhile are counted.
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='tag',
+            index=models.Index(fields=['user', '-post_count', 'name'], name='tag_user_post_count_idx'),
+        ),
+    ]
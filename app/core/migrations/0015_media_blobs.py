@@ -0,0 +1,139 @@
+# Generated by Django 4.0.10 on 2026-10-17 07:00
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+# Names referred to by the image columns of the rows in {rows}.
+REFS = """
+    SELECT r.name, {delta} AS delta
+    FROM {rows} p
+    CROSS JOIN LATERAL (
+        VALUES (p.image), (p.image_thumbnail), (p.image_medium)
+    ) AS r(name)
+    {where}
+"""
+
+# Updates only count rows whose images changed.
+CHANGED = """
+    JOIN {other} o ON o.id = p.id
+    WHERE (p.image, p.image_thumbnail, p.image_medium)
+        IS DISTINCT FROM (o.image, o.image_thumbnail, o.image_medium)
+"""
+
+# Statement level triggers apply each name's net change in one statement;
+# new names are inserted in name order so concurrent posts cannot deadlock.
+ADJUST = """
+    WITH deltas AS (
+        SELECT name, sum(delta) AS delta FROM ({refs}) refs
+        WHERE name <> '' GROUP BY name
+    ), released AS (
+        UPDATE core_mediablob b
+        SET ref_count = GREATEST(b.ref_count + d.delta, 0)
+        FROM deltas d
+        WHERE b.name = d.name AND d.delta < 0
+    )
+    INSERT INTO core_mediablob AS b (name, ref_count)
+    SELECT name, delta FROM deltas WHERE delta > 0 ORDER BY name
+    ON CONFLICT (name) DO UPDATE
+    SET ref_count = b.ref_count + EXCLUDED.ref_count;
+    RETURN NULL;
+"""
+
+INSERTED = REFS.format(rows='new_rows', delta=1, where='')
+DELETED = REFS.format(rows='old_rows', delta=-1, where='')
+UPDATED = (
+    REFS.format(
+        rows='new_rows', delta=1,
+        where=CHANGED.format(other='old_rows'))
+    + 'UNION ALL'
+    + REFS.format(
+        rows='old_rows', delta=-1,
+        where=CHANGED.format(other='new_rows'))
+)
+
+CREATE_TRIGGERS = f"""
+CREATE FUNCTION core_mediablob_insert() RETURNS trigger AS $$
+BEGIN
+{ADJUST.format(refs=INSERTED)}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_mediablob_update() RETURNS trigger AS $$
+BEGIN
+{ADJUST.format(refs=UPDATED)}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION core_mediablob_delete() RETURNS trigger AS $$
+BEGIN
+{ADJUST.format(refs=DELETED)}
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_post_media_refs_insert
+    AFTER INSERT ON core_post
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_mediablob_insert();
+
+CREATE TRIGGER core_post_media_refs_update
+    AFTER UPDATE ON core_post
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_mediablob_update();
+
+CREATE TRIGGER core_post_media_refs_delete
+    AFTER DELETE ON core_post
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION core_mediablob_delete();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS core_post_media_refs_insert ON core_post;
+DROP TRIGGER IF EXISTS core_post_media_refs_update ON core_post;
+DROP TRIGGER IF EXISTS core_post_media_refs_delete ON core_post;
+DROP FUNCTION IF EXISTS core_mediablob_insert();
+DROP FUNCTION IF EXISTS core_mediablob_update();
+DROP FUNCTION IF EXISTS core_mediablob_delete();
+"""
+
+COUNT_EXISTING = f"""
+INSERT INTO core_mediablob (name, ref_count)
+SELECT name, sum(delta) FROM ({REFS.format(
+    rows='core_post', delta=1, where='')}) refs
+WHERE name <> '' GROUP BY name;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_post_image_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.post_image_path),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image_medium',
+            field=models.ImageField(editable=False, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.post_image_path),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image_thumbnail',
+            field=models.ImageField(editable=False, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.post_image_path),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+        migrations.RunSQL(COUNT_EXISTING, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.0.10 on 2026-10-17 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FOLLOWER_COUNT_FUNCTION = """
+CREATE OR REPLACE FUNCTION core_follow_follower_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        {increment}
+    ELSE
+        {decrement}
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+# Follows wait for the copy, so no change is counted twice or lost.
+MOVE_COUNTS = """
+LOCK TABLE core_follow IN SHARE MODE;
+INSERT INTO core_followercount (user_id, count)
+SELECT id, follower_count FROM core_user WHERE follower_count > 0;
+""" + FOLLOWER_COUNT_FUNCTION.format(
+    increment=(
+        'INSERT INTO core_followercount (user_id, count) '
+        'VALUES (NEW.followee_id, 1) '
+        'ON CONFLICT (user_id) DO UPDATE '
+        'SET count = core_followercount.count + 1;'),
+    decrement=(
+        'UPDATE core_followercount SET count = count - 1 '
+        'WHERE user_id = OLD.followee_id;'),
+)
+
+RESTORE_COUNTS = """
+LOCK TABLE core_follow IN SHARE MODE;
+UPDATE core_user u SET follower_count = f.count
+FROM core_followercount f WHERE f.user_id = u.id;
+""" + FOLLOWER_COUNT_FUNCTION.format(
+    increment=(
+        'UPDATE core_user SET follower_count = follower_count + 1 '
+        'WHERE id = NEW.followee_id;'),
+    decrement=(
+        'UPDATE core_user SET follower_count = follower_count - 1 '
+        'WHERE id = OLD.followee_id;'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_media_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FollowerCount',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='follower_count', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(MOVE_COUNTS, RESTORE_COUNTS),
+        migrations.RemoveField(
+            model_name='user',
+            name='follower_count',
+        ),
+    ]
@@ -5,16 +5,41 @@ import os
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin)
 
+from core.storage import post_image_storage
+
+
+POST_IMAGE_DIR = os.path.join('uploads', 'post')
+# Post columns holding names of files in POST_IMAGE_DIR.
+POST_IMAGE_FIELDS = ['image', 'image_thumbnail', 'image_medium']
+
 
 def post_image_path(instance, filename):
     """Generate file path for new post image"""
     file_extension = os.path.splitext(filename)[1]
     filename = f'{uuid.uuid4()}{file_extension}'
 
-    return os.path.join('uploads', 'post', filename)
+    return os.path.join(POST_IMAGE_DIR, filename)
+
+
+def update_fields_excluding(instance, excluded):
+    """Return the loaded fields of instance to save, leaving out excluded.
+
+    For columns maintained by database triggers, which a save of a stale
+    in-memory copy would otherwise overwrite.
+    """
+    deferred = instance.get_deferred_fields()
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key
+        and field.attname not in deferred
+        and field.name not in excluded
+    ]
 
 
 class UserManager(BaseUserManager):
@@ -62,18 +87,210 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField(to='core.Tag')
-    image = models.ImageField(null=True, upload_to=post_image_path)
+    # Stored by content hash and shared between posts, see MediaBlob.
+    image = models.ImageField(
+        null=True, upload_to=post_image_path, storage=post_image_storage)
+    # Resized, EXIF-free copies of image, filled by post.images.
+    image_thumbnail = models.ImageField(
+        null=True, editable=False, upload_to=post_image_path,
+        storage=post_image_storage)
+    image_medium = models.ImageField(
+        null=True, editable=False, upload_to=post_image_path,
+        storage=post_image_storage)
+    # Maintained by the core_post_search_vector trigger from title/content.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Serves the per-user post list ordered newest first.
+            models.Index(fields=['user', '-id'], name='post_user_id_desc_idx'),
+            GinIndex(fields=['search_vector'], name='post_search_vector_idx'),
+            # Serve access checks on media files, see post.media.
+            models.Index(fields=['image'], name='post_image_idx'),
+            models.Index(
+                fields=['image_thumbnail'], name='post_image_thumbnail_idx'),
+            models.Index(
+                fields=['image_medium'], name='post_image_medium_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class TagManager(models.Manager):
+    """Manager for tags."""
+
+    def get_or_create_many(self, user, names):
+        """Return user's tags for names, creating missing ones in bulk."""
+        names = list(dict.fromkeys(names))
+        tags = {
+            tag.name: tag for tag in self.filter(user=user, name__in=names)
+        }
+        missing = [name for name in names if name not in tags]
+        if missing:
+            # Conflicts are tags created concurrently; re-read them below.
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            tags.update(
+                (tag.name, tag)
+                for tag in self.filter(user=user, name__in=missing)
+            )
+
+        return [tags[name] for name in names]
+
+
 class Tag(models.Model):
     """Tag model for filtering post"""
     name = models.CharField(max_length=150)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE)
+    # Maintained by the core_post_tags_post_count triggers; see the
+    # reconcile_tag_counts command.
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TagManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'], name='unique_tag_name_per_user'),
+        ]
+        indexes = [
+            # Serves the user's tags by usage.
+            models.Index(
+                fields=['user', '-post_count', 'name'],
+                name='tag_user_post_count_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Save the tag without writing post_count."""
+        if (not self._state.adding and not args
+                and kwargs.get('update_fields') is None):
+            kwargs['update_fields'] = update_fields_excluding(
+                self, {'post_count'})
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class ContentVersionManager(models.Manager):
+    """Manager for content versions."""
+
+    def for_user(self, user):
+        """Return user's current version.
+
+        Read from the alias serving the request's other reads, so a
+        replica's stamp always matches the rows it returns.
+        """
+        stamp = self.filter(user=user).first()
+        if stamp is None:
+            stamp = self.get_or_create(user=user)[0]
+        return stamp
+
+
+class ContentVersion(models.Model):
+    """Version stamp of a user's posts and tags.
+
+    Rows are created and bumped by database triggers, so every write path
+    (bulk operations, admin, background workers) moves the stamp.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True)
+    version = models.BigIntegerField(default=1)
+    modified_at = models.DateTimeField(default=timezone.now)
+
+    objects = ContentVersionManager()
+
+    def __str__(self):
+        return f'{self.user_id}:{self.version}'
+
+
+class Follow(models.Model):
+    """A user following another user's posts."""
+    follower = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='following')
+    followee = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='followers')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Also serves lookups of whom a user follows.
+            models.UniqueConstraint(
+                fields=['follower', 'followee'], name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(follower=models.F('followee')),
+                name='follow_not_self'),
+        ]
+
+    def __str__(self):
+        return f'{self.follower_id} -> {self.followee_id}'
+
+
+class FollowerCount(models.Model):
+    """Number of users following a user.
+
+    Kept off User so that saving a user never writes it back stale. Rows
+    are created and updated by the core_follow_follower_count trigger;
+    users never followed have none.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='follower_count')
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}: {self.count}'
+
+
+class TimelineEntry(models.Model):
+    """A post in a user's materialized feed, written by post.feed.
+
+    Entries are added and removed in the background, so post points at
+    posts that may already be gone; the feed joins them away.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+')
+
+    class Meta:
+        constraints = [
+            # Serves the feed newest first and makes fan-out idempotent.
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}:{self.post_id}'
+
+
+class MediaBlob(models.Model):
+    """Number of post image columns referring to a stored file.
+
+    Maintained by the core_post_media_refs triggers, so files shared by
+    posts through core.storage are deleted only once unused.
+    """
+    name = models.CharField(max_length=100, primary_key=True)
+    ref_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.name}: {self.ref_count}'
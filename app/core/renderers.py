@@ -0,0 +1,31 @@
+"""
+Renderers for the API.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer rendering compact output with orjson.
+
+    Strings, integers, booleans, None, datetimes, Decimals and dict keys
+    give JSONRenderer's bytes, as do floats written without an exponent.
+    Floats differ otherwise: orjson writes 1e16 where json writes 1e+16,
+    and NaN and infinities become null rather than being rejected. The
+    post and tag lists carry no floats.
+
+    Indented or ASCII-escaped output is left to JSONRenderer.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (data is None or indent is not None or self.ensure_ascii
+                or not self.compact):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self.encoder_class().default, option=self.options)
+        # Keep JSONRenderer's escaping of the JavaScript line separators.
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
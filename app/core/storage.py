@@ -0,0 +1,162 @@
+"""
+Content-addressed file storage for post images.
+
+Files are named after the SHA-256 of their content, so an image uploaded
+for many posts is stored once and shared. How many post columns refer to
+each name is counted in MediaBlob by database triggers; a shared file is
+only deleted once nothing refers to it.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import time
+
+from PIL import Image, UnidentifiedImageError
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+
+# Extensions are derived from the image format, never from the client's
+# file name, so equal content gets one name and names match content.
+IMAGE_EXTENSIONS = {
+    'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp',
+}
+CONTENT_TYPES = {
+    '.jpg': 'image/jpeg', '.jpeg': 'image/jpeg', '.png': 'image/png',
+    '.gif': 'image/gif', '.webp': 'image/webp',
+}
+CONTENT_NAME = re.compile(r'[0-9a-f]{64}(%s)?' % '|'.join(
+    re.escape(extension) for extension in IMAGE_EXTENSIONS.values()))
+
+
+def is_content_name(name):
+    """Return whether name is the name of a content-addressed file."""
+    return CONTENT_NAME.fullmatch(posixpath.basename(name)) is not None
+
+
+def content_name(name, digest, extension):
+    """Return the name for content with digest stored in place of name."""
+    return posixpath.join(posixpath.dirname(name), digest + extension)
+
+
+def image_extension(file):
+    """Return the extension for the image format of a path or file.
+
+    Files that are not images of a known format get none.
+    """
+    try:
+        # Only the header is parsed.
+        with Image.open(file) as image:
+            return IMAGE_EXTENSIONS.get(image.format, '')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return ''
+
+
+def content_type(name):
+    """Return the content type to serve the stored file name with."""
+    extension = posixpath.splitext(name)[1].lower()
+    return CONTENT_TYPES.get(extension, 'application/octet-stream')
+
+
+def file_digest(content):
+    """Return the SHA-256 hex digest of a Django File."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage keeping one file per distinct content.
+
+    The name asked for only contributes its directory; the extension
+    follows the image format.
+    Saving content that is already stored writes nothing and returns the
+    existing name, after touching the file so that deleting it as unused
+    waits out MEDIA_GRACE_SECONDS while the new reference commits.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # _save picks the name; equal content is meant to collide.
+        return name
+
+    def _save(self, name, content):
+        digest = getattr(content, 'content_sha256', None)
+        if digest is not None and hasattr(content, 'temporary_file_path'):
+            # Hashed by the upload handler while it received the file.
+            source, spooled = content.temporary_file_path(), False
+        else:
+            source, digest = self._spool(posixpath.dirname(name), content)
+            spooled = True
+
+        name = content_name(name, digest, image_extension(source))
+        path = self.path(name)
+        if os.path.exists(path):
+            os.utime(path)
+            if spooled:
+                os.remove(source)
+            return name
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Equal content written concurrently replaces the file atomically.
+        file_move_safe(source, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return name
+
+    def _spool(self, directory, content):
+        """Copy content to a temporary file next to its blob, hashing it.
+
+        Returns the temporary path and the digest.
+        """
+        directory = self.path(directory)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(
+                dir=directory, prefix='.spool-', delete=False) as spool:
+            try:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    spool.write(chunk)
+            except BaseException:
+                os.remove(spool.name)
+                raise
+        return spool.name, digest.hexdigest()
+
+    def delete(self, name):
+        """Delete the file unless posts refer to it or it is fresh."""
+        self.delete_unused(name, settings.MEDIA_GRACE_SECONDS)
+
+    def delete_unused(self, name, grace_seconds):
+        """Delete the file if unreferenced and older than grace_seconds.
+
+        Returns whether it was deleted.
+        """
+        MediaBlob = apps.get_model('core', 'MediaBlob')
+        with transaction.atomic():
+            blob = MediaBlob.objects.select_for_update().filter(
+                name=name).first()
+            if blob is not None and blob.ref_count:
+                return False
+            try:
+                age = time.time() - os.path.getmtime(self.path(name))
+            except FileNotFoundError:
+                age = None
+            if age is not None and age < grace_seconds:
+                # An upload may have just found it and not yet committed.
+                return False
+            super().delete(name)
+            if blob is not None:
+                blob.delete()
+        return age is not None
+
+
+post_image_storage = ContentAddressedStorage()
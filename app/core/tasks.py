@@ -0,0 +1,56 @@
+"""
+Background work outside the request thread.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Return the process wide worker pool, starting it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='background',
+            )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        # Worker threads own their connections; don't leave them open.
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """Run func in the worker pool.
+
+    With BACKGROUND_WORKERS set to 0 the task runs inline instead, which
+    keeps tests and management commands deterministic.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            logger.exception('Background task %s failed', func.__name__)
+            return None
+    return _get_executor().submit(_run, func, args, kwargs)
+
+
+def submit_on_commit(func, *args, **kwargs):
+    """Submit func once the current transaction commits."""
+    transaction.on_commit(lambda: submit(func, *args, **kwargs))
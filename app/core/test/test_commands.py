@@ -2,13 +2,25 @@
 Test custom Django management commands.
 """
 
+import hashlib
+import json
+import os
+import tempfile
+import time
+from io import BytesIO, StringIO
 from unittest.mock import patch
 
+from PIL import Image
 from psycopg2 import OperationalError as Psycopg2OpError
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings)
+
+from core.models import MediaBlob, Post, Tag, TimelineEntry
 
 
 @patch('core.management.commands.wait_for_db.Command.check')
@@ -32,3 +44,456 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+    @patch('time.sleep')
+    def test_wait_for_db_backoff(self, patched_sleep, patched_check):
+        """Test delays between attempts double up to the maximum."""
+        patched_check.side_effect = [OperationalError] * 5 + [True]
+
+        call_command('wait_for_db', '--max-delay=1', stdout=StringIO())
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4, 0.8, 1])
+
+    @patch('time.monotonic')
+    @patch('time.sleep')
+    def test_wait_for_db_timeout(self, patched_sleep, patched_monotonic,
+                                 patched_check):
+        """Test waiting gives up once the timeout passes."""
+        patched_check.side_effect = OperationalError
+        patched_monotonic.side_effect = [0, 0.5, 1.5, 3.5]
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout=3', stdout=StringIO())
+
+        delays = [c.args[0] for c in patched_sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2])
+
+    @patch('time.sleep')
+    def test_wait_for_db_probe(self, patched_sleep, patched_check):
+        """Test probe mode checks once and fails without waiting."""
+        call_command('wait_for_db', '--probe', stdout=StringIO())
+
+        patched_check.side_effect = OperationalError
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--probe', stdout=StringIO())
+
+        self.assertEqual(patched_check.call_count, 2)
+        patched_sleep.assert_not_called()
+
+
+class RebuildSearchIndexTests(TestCase):
+    """Test rebuilding the post search index."""
+
+    def test_rebuild_fills_missing_vectors(self):
+        """Test posts without a search vector get one."""
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        Post.objects.bulk_create(
+            Post(user=user, title=f'Post {i}', content='Lighthouse')
+            for i in range(5)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute('ALTER TABLE core_post DISABLE TRIGGER USER')
+            cursor.execute('UPDATE core_post SET search_vector = NULL')
+            cursor.execute('ALTER TABLE core_post ENABLE TRIGGER USER')
+
+        out = StringIO()
+        call_command('rebuild_search_index', chunk_size=2, stdout=out)
+
+        self.assertFalse(
+            Post.objects.filter(search_vector__isnull=True).exists())
+        self.assertEqual(
+            Post.objects.filter(search_vector='lighthouse').count(), 5)
+        self.assertIn('5 posts', out.getvalue())
+
+
+class ReconcileTagCountsTests(TestCase):
+    """Test correcting tag post counts."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        self.tag = Tag.objects.create(user=user, name='Food')
+        self.empty = Tag.objects.create(user=user, name='Empty')
+        post = Post.objects.create(user=user, title='T', content='C')
+        post.tags.add(self.tag)
+        Tag.objects.update(post_count=5)
+
+    def test_reconcile_fixes_drift(self):
+        """Test drifted counters are recounted."""
+        out = StringIO()
+
+        call_command('reconcile_tag_counts', chunk_size=1, stdout=out)
+
+        self.tag.refresh_from_db()
+        self.empty.refresh_from_db()
+        self.assertEqual(self.tag.post_count, 1)
+        self.assertEqual(self.empty.post_count, 0)
+        self.assertIn('Checked 2 tags, 2 fixed', out.getvalue())
+
+    def test_reconcile_dry_run(self):
+        """Test a dry run reports drift without writing."""
+        out = StringIO()
+
+        call_command('reconcile_tag_counts', dry_run=True, stdout=out)
+
+        self.tag.refresh_from_db()
+        self.assertEqual(self.tag.post_count, 5)
+        self.assertIn(f'Tag {self.tag.id}: post_count 5, 1 posts',
+                      out.getvalue())
+
+
+class PruneTimelinesTests(TestCase):
+    """Test deleting timeline entries of deleted posts."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        post = Post.objects.create(user=user, title='T', content='C')
+        self.kept = TimelineEntry.objects.create(user=user, post=post)
+        for post_id in [post.id + 1, post.id + 2]:
+            TimelineEntry.objects.create(user=user, post_id=post_id)
+
+    def test_prune_timelines(self):
+        """Test dangling entries are deleted."""
+        out = StringIO()
+
+        call_command('prune_timelines', chunk_size=1, stdout=out)
+
+        self.assertEqual(
+            list(TimelineEntry.objects.values_list('id', flat=True)),
+            [self.kept.id])
+        self.assertIn('Checked 3 timeline entries, 2 deleted', out.getvalue())
+
+    def test_prune_timelines_dry_run(self):
+        """Test a dry run counts dangling entries only."""
+        out = StringIO()
+
+        call_command('prune_timelines', dry_run=True, stdout=out)
+
+        self.assertEqual(TimelineEntry.objects.count(), 3)
+        self.assertIn('2 dangling', out.getvalue())
+
+
+class SeedDataTests(TransactionTestCase):
+    """Test generating sample data.
+
+    Run after the TestCase suites: rolled back bulk inserts leave the
+    tables bloated, which skews the query plan tests.
+    """
+
+    def _seed(self, **options):
+        call_command('seed_data', stdout=StringIO(), **options)
+        return [
+            (post.user.email, post.title, post.content,
+             sorted(tag.name for tag in post.tags.all()))
+            for post in Post.objects.order_by('id')
+            .select_related('user').prefetch_related('tags')
+        ]
+
+    def test_seed_creates_rows(self):
+        """Test the requested numbers of rows are created."""
+        self._seed(users=3, posts_per_user=5, tags_per_user=4,
+                   tags_per_post=2, batch_size=2)
+
+        self.assertEqual(get_user_model().objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 15)
+        self.assertEqual(Tag.objects.count(), 12)
+        self.assertEqual(Post.tags.through.objects.count(), 30)
+        user = get_user_model().objects.first()
+        self.assertTrue(user.check_password('password'))  # type: ignore
+
+    def test_seed_is_deterministic(self):
+        """Test the same seed produces the same data."""
+        first = self._seed(users=2, posts_per_user=3, seed=4)
+        get_user_model().objects.all().delete()
+        second = self._seed(users=2, posts_per_user=3, seed=4)
+
+        self.assertEqual(first, second)
+        get_user_model().objects.all().delete()
+        self.assertNotEqual(
+            first, self._seed(users=2, posts_per_user=3, seed=5))
+
+    def test_seed_twice_rejected(self):
+        """Test seeding the same seed again fails without writing."""
+        self._seed(users=1, posts_per_user=1)
+
+        with self.assertRaises(CommandError):
+            self._seed(users=1, posts_per_user=1)
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class BenchApiTests(TransactionTestCase):
+    """Test the API benchmark command."""
+
+    def test_bench_reports_endpoints(self):
+        """Test every endpoint is reported with percentiles."""
+        call_command('seed_data', users=1, posts_per_user=3,
+                     stdout=StringIO())
+        out = StringIO()
+
+        call_command('bench_api', requests=3, warmup=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('p99 ms', output)
+        for name in ('post list', 'post detail', 'tag list', 'user me'):
+            self.assertIn(name, output)
+
+    def test_bench_requires_data(self):
+        """Test benchmarking an empty database fails clearly."""
+        with self.assertRaises(CommandError):
+            call_command('bench_api', stdout=StringIO())
+
+    def test_bench_user_without_posts(self):
+        """Test benchmarking as a user with no posts fails clearly."""
+        get_user_model().objects.create_user(  # type: ignore
+            email='empty@example.com', password='testpass123')
+
+        with self.assertRaisesMessage(CommandError, 'User has no posts'):
+            call_command(
+                'bench_api', email='empty@example.com', stdout=StringIO())
+
+
+class ImportUsersTests(TestCase):
+    """Test importing users from files."""
+
+    def _write(self, suffix, content):
+        """Write content to a temporary file and return its path."""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_users', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        """Test users are created with hashed passwords."""
+        path = self._write('.csv', (
+            'email,name,password\n'
+            'one@Example.com,One,secret-1\n'
+            'two@example.com,Two,\n'
+        ))
+
+        out, _ = self._import(path, workers=0, batch_size=1)
+
+        one = get_user_model().objects.get(email='one@example.com')
+        self.assertEqual(one.name, 'One')
+        self.assertTrue(one.check_password('secret-1'))  # type: ignore
+        two = get_user_model().objects.get(email='two@example.com')
+        self.assertFalse(two.has_usable_password())  # type: ignore
+        self.assertIn('Imported 2 users', out)
+
+    def test_import_ndjson_process_pool(self):
+        """Test passwords hashed in worker processes are usable."""
+        path = self._write('.ndjson', ''.join(
+            json.dumps({'email': f'user{i}@example.com',
+                        'password': f'secret-{i}'}) + '\n'
+            for i in range(3)
+        ))
+
+        self._import(path, workers=2, batch_size=2)
+
+        for i in range(3):
+            user = get_user_model().objects.get(email=f'user{i}@example.com')
+            self.assertTrue(
+                user.check_password(f'secret-{i}'))  # type: ignore
+
+    def test_skips_existing_and_invalid(self):
+        """Test existing, repeated and invalid records are skipped."""
+        get_user_model().objects.create_user(  # type: ignore
+            email='old@example.com', password='keep-me')
+        path = self._write('.ndjson', (
+            '{"email": "old@example.com", "password": "x"}\n'
+            '{"email": "new@example.com"}\n'
+            '{"email": "new@example.com"}\n'
+            '{"email": "not-an-email"}\n'
+            '{"name": "No email"}\n'
+            'not json\n'
+        ))
+
+        out, err = self._import(path, workers=0)
+
+        self.assertEqual(get_user_model().objects.count(), 2)
+        old = get_user_model().objects.get(email='old@example.com')
+        self.assertTrue(old.check_password('keep-me'))  # type: ignore
+        self.assertIn('skipped 2 existing and 3 invalid', out)
+        self.assertIn('Line 4', err)
+
+    def test_unknown_format(self):
+        """Test a file without a known extension needs --format."""
+        path = self._write('.txt', '')
+
+        with self.assertRaises(CommandError):
+            self._import(path)
+
+
+def image_bytes(image_format):
+    """Return a small image encoded in image_format."""
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+SAME = image_bytes('JPEG')
+OTHER = image_bytes('PNG')
+
+
+class DedupeMediaTests(TestCase):
+    """Test moving post images to content-addressed names."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(
+            MEDIA_ROOT=media_root.name, MEDIA_GRACE_SECONDS=60)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = os.path.join(media_root.name, 'uploads', 'post')
+        os.makedirs(self.directory)
+
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        self.posts = [
+            Post.objects.create(
+                user=user, title=name, content='C',
+                image=self._write(name, SAME))
+            for name in ['a.jpg', 'b.jpg']
+        ]
+        self.posts.append(Post.objects.create(
+            user=user, title='c', content='C',
+            image=self._write('c.JPG', OTHER)))
+        self.digest = hashlib.sha256(SAME).hexdigest()
+
+    def _write(self, name, data):
+        """Write an old, UUID-style named file and return its name."""
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as image_file:
+            image_file.write(data)
+        os.utime(path, (0, 0))
+        return f'uploads/post/{name}'
+
+    def _images(self):
+        return [
+            Post.objects.get(id=post.id).image.name for post in self.posts]
+
+    def test_dedupe_media(self):
+        """Test identical files are merged and posts point at them."""
+        out = StringIO()
+
+        call_command('dedupe_media', chunk_size=2, stdout=out)
+
+        # c.JPG holds a PNG and is named by its format.
+        other = hashlib.sha256(OTHER).hexdigest()
+        self.assertEqual(self._images(), [
+            f'uploads/post/{self.digest}.jpg',
+            f'uploads/post/{self.digest}.jpg',
+            f'uploads/post/{other}.png',
+        ])
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            sorted([f'{self.digest}.jpg', f'{other}.png']))
+        self.assertEqual(
+            MediaBlob.objects.get(
+                name=f'uploads/post/{self.digest}.jpg').ref_count, 2)
+        self.assertIn('2 files were renamed and 1 merged', out.getvalue())
+
+    def test_dedupe_media_dry_run(self):
+        """Test a dry run reports merges without changes."""
+        out = StringIO()
+
+        call_command('dedupe_media', dry_run=True, chunk_size=1, stdout=out)
+
+        self.assertEqual(
+            self._images(),
+            ['uploads/post/a.jpg', 'uploads/post/b.jpg', 'uploads/post/c.JPG'])
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+        self.assertIn('2 files would be renamed and 1 merged', out.getvalue())
+
+    def test_dedupe_media_missing_file(self):
+        """Test posts whose file is gone are left alone."""
+        os.remove(os.path.join(self.directory, 'c.JPG'))
+        err = StringIO()
+
+        call_command('dedupe_media', stdout=StringIO(), stderr=err)
+
+        self.assertEqual(self._images()[2], 'uploads/post/c.JPG')
+        self.assertIn('uploads/post/c.JPG: file missing', err.getvalue())
+
+
+class GcMediaTests(TestCase):
+    """Test deleting post images no post refers to."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = os.path.join(media_root.name, 'uploads', 'post')
+        os.makedirs(self.directory)
+
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        Post.objects.create(
+            user=user, title='T', content='C',
+            image=self._write('used.jpg'),
+            image_thumbnail=self._write('thumb.webp'))
+        self._write('orphan.jpg')
+        self._write('fresh.jpg', age=0)
+
+    def _write(self, name, age=7 * 24 * 60 * 60):
+        """Write a file modified age seconds ago and return its name."""
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as image_file:
+            image_file.write(b'data')
+        modified = time.time() - age
+        os.utime(path, (modified, modified))
+        return f'uploads/post/{name}'
+
+    def _files(self):
+        return sorted(os.listdir(self.directory))
+
+    def test_gc_media(self):
+        """Test old unreferenced files are deleted."""
+        out = StringIO()
+
+        call_command('gc_media', chunk_size=1, stdout=out)
+
+        self.assertEqual(
+            self._files(), ['fresh.jpg', 'thumb.webp', 'used.jpg'])
+        self.assertIn(
+            'Checked 3 files, 1 unreferenced were deleted (4 bytes)',
+            out.getvalue())
+
+    def test_gc_media_dry_run(self):
+        """Test a dry run reports files without deleting them."""
+        out = StringIO()
+
+        call_command('gc_media', dry_run=True, verbosity=2, stdout=out)
+
+        self.assertEqual(len(self._files()), 4)
+        self.assertIn('uploads/post/orphan.jpg: 4 bytes', out.getvalue())
+        self.assertIn('1 unreferenced would be deleted', out.getvalue())
+
+    def test_gc_media_grace(self):
+        """Test the grace period can be shortened."""
+        call_command('gc_media', grace=-1, stdout=StringIO())
+
+        self.assertEqual(self._files(), ['thumb.webp', 'used.jpg'])
+
+    def test_gc_media_rechecks_ref_count(self):
+        """Test a file counted as referenced when deleting is kept."""
+        # As if a post started using it after the directory scan.
+        Post.objects.update(image=None)
+        MediaBlob.objects.filter(name='uploads/post/used.jpg').update(
+            ref_count=1)
+
+        call_command('gc_media', stdout=StringIO())
+
+        self.assertIn('used.jpg', self._files())
@@ -0,0 +1,45 @@
+"""
+Tests for database connection helpers.
+"""
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.db import close_unusable_connections
+
+
+class HealthCheckTests(TransactionTestCase):
+    """Test persistent connections are checked before reuse."""
+
+    def setUp(self):
+        connection.ensure_connection()
+        patcher = patch.dict(
+            connection.settings_dict, {'CONN_HEALTH_CHECKS': True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_usable_connection_kept(self):
+        """Test a healthy connection is reused."""
+        raw = connection.connection
+
+        close_unusable_connections()
+
+        self.assertIs(connection.connection, raw)
+
+    def test_broken_connection_closed(self):
+        """Test a connection failing the check is replaced."""
+        with patch.object(connection, 'is_usable', return_value=False):
+            close_unusable_connections()
+
+        self.assertIsNone(connection.connection)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_disabled_skips_check(self):
+        """Test nothing is checked without CONN_HEALTH_CHECKS."""
+        connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+        with patch.object(connection, 'is_usable') as is_usable:
+            close_unusable_connections()
+
+        is_usable.assert_not_called()
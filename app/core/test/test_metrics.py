@@ -0,0 +1,124 @@
+"""
+Tests for the request metrics middleware and endpoint.
+"""
+from asgiref.sync import async_to_sync
+from prometheus_client import REGISTRY
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Tag
+
+
+TAGS_URL = reverse('post:tag-list')
+ASYNC_TAGS_URL = reverse('post:async-tag-list')
+METRICS_URL = reverse('metrics')
+
+
+def sample(name, **labels):
+    """Return the current value of a metric sample, 0 if not recorded."""
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsMiddlewareTests(TestCase):
+    """Test requests are recorded per view."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        Tag.objects.create(user=self.user, name='Food')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_records_request(self):
+        """Test latency, queries and size are recorded for the view."""
+        labels = {'method': 'GET', 'view': 'post:tag-list'}
+        requests = sample(
+            'http_request_duration_seconds_count', status='200', **labels)
+        queries = sample('http_request_db_queries_sum', **labels)
+        size = sample('http_response_size_bytes_sum', **labels)
+
+        with self.assertNumQueries(3) as ctx:
+            res = self.client.get(TAGS_URL)
+
+        self.assertEqual(sample(
+            'http_request_duration_seconds_count', status='200', **labels),
+            requests + 1)
+        self.assertEqual(
+            sample('http_request_db_queries_sum', **labels) - queries,
+            len(ctx.captured_queries))
+        self.assertGreater(
+            sample('http_request_db_duration_seconds_sum', **labels), 0)
+        self.assertEqual(
+            sample('http_response_size_bytes_sum', **labels) - size,
+            len(res.content))
+
+    def test_unmatched_path(self):
+        """Test unknown paths share one label."""
+        labels = {'method': 'GET', 'view': '<unmatched>', 'status': '404'}
+        before = sample('http_request_duration_seconds_count', **labels)
+
+        self.client.get('/no/such/path/')
+
+        self.assertEqual(
+            sample('http_request_duration_seconds_count', **labels),
+            before + 1)
+
+    @override_settings(ASYNC_DB_WORKERS=0)
+    def test_async_view_queries(self):
+        """Test queries of async views are counted."""
+        labels = {'method': 'GET', 'view': 'post:async-tag-list'}
+        before = sample('http_request_db_queries_sum', **labels)
+
+        async def send():
+            return await AsyncClient().get(
+                ASYNC_TAGS_URL, authorization=f'Token {self.token.key}')
+
+        res = async_to_sync(send)()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(
+            sample('http_request_db_queries_sum', **labels), before)
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics_endpoint(self):
+        """Test the metrics are exposed in the Prometheus format."""
+        self.client.get(TAGS_URL)
+
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            b'http_request_duration_seconds_bucket{', res.content)
+        self.assertIn(b'view="post:tag-list"', res.content)
+
+    def test_metrics_refused_by_default(self):
+        """Test scrapers must be configured to read the metrics."""
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_metrics_other_ip_refused(self):
+        """Test addresses outside the allowlist are refused."""
+        res = APIClient().get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_bearer_token(self):
+        """Test scrapers may authenticate with the metrics token."""
+        client = APIClient()
+
+        res = client.get(METRICS_URL, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(res.status_code, 403)
+
+        res = client.get(
+            METRICS_URL, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(res.status_code, 200)
@@ -1,7 +1,10 @@
 """
 Test cases for models.
 """
+from importlib import import_module
 from unittest.mock import patch
+from django.apps import apps
+from django.db import IntegrityError, connection
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -54,6 +57,29 @@ class ModelTests(TestCase):
 
         self.assertTrue(user.is_superuser)
         self.assertTrue(user.is_staff)
+        user.refresh_from_db()
+        self.assertTrue(user.is_superuser)
+        self.assertTrue(user.is_staff)
+
+    def test_save_deferred_user(self):
+        """Test saving a user loaded with only() writes loaded fields."""
+        user = create_user()
+        get_user_model().objects.filter(id=user.id).update(is_staff=True)
+        partial = get_user_model().objects.only('name').get(id=user.id)
+
+        partial.name = 'Renamed'
+        partial.save()
+
+        user.refresh_from_db()
+        self.assertEqual(user.name, 'Renamed')
+        self.assertTrue(user.is_staff)
+
+    def test_save_user_with_assigned_id(self):
+        """Test saving a new user with a chosen id inserts it."""
+        user = get_user_model()(id=4242, email='chosen@example.com')
+        user.save()
+
+        self.assertTrue(get_user_model().objects.filter(id=4242).exists())
 
     def test_create_post(self):
         """Test creating a post is sccessful"""
@@ -76,6 +102,30 @@ class ModelTests(TestCase):
 
         self.assertEqual(str(tag), tag.name)
 
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = create_user()
+        other_user = create_user(email='other@example.com')
+        models.Tag.objects.create(user=user, name='Earth')
+        models.Tag.objects.create(user=other_user, name='Earth')
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name='Earth')
+
+    def test_get_or_create_many_tags(self):
+        """Test resolving tag names reuses existing and creates missing"""
+        user = create_user()
+        existing = models.Tag.objects.create(user=user, name='Earth')
+
+        with self.assertNumQueries(3):
+            tags = models.Tag.objects.get_or_create_many(
+                user, ['Wind', 'Earth', 'Fire', 'Wind'])
+
+        self.assertEqual([t.name for t in tags], ['Wind', 'Earth', 'Fire'])
+        self.assertEqual(tags[1], existing)
+        self.assertTrue(all(tag.id for tag in tags))
+        self.assertEqual(models.Tag.objects.filter(user=user).count(), 3)
+
     @patch('core.models.uuid.uuid4')
     def test_post_file_name_uuid(self, mock_uuid):
         """Test generating image path"""
@@ -84,3 +134,161 @@ class ModelTests(TestCase):
         file_path = models.post_image_path(None, 'example.jpg')
 
         self.assertEqual(file_path, f'uploads/post/{uuid}.jpg')
+
+
+class TagPostCountTests(TestCase):
+    """Test tag post counts follow changes to post tags."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.tags = [
+            models.Tag.objects.create(user=self.user, name=name)
+            for name in ('Food', 'Travel')
+        ]
+
+    def assertCounts(self, *counts):
+        self.assertEqual(
+            [tag.post_count
+             for tag in models.Tag.objects.order_by('id')], list(counts))
+
+    def _post(self, *tags):
+        post = models.Post.objects.create(
+            user=self.user, title='Title', content='Content')
+        post.tags.add(*tags)
+        return post
+
+    def test_links_counted(self):
+        """Test adding and removing tags adjusts the counts."""
+        food, travel = self.tags
+        post = self._post(food, travel)
+        self._post(food)
+        self.assertCounts(2, 1)
+
+        post.tags.remove(travel)
+        self.assertCounts(2, 0)
+
+        post.delete()
+        self.assertCounts(1, 0)
+
+    def test_bulk_links_counted(self):
+        """Test links created in bulk are counted per tag."""
+        posts = models.Post.objects.bulk_create(
+            models.Post(user=self.user, title=f'{i}', content='Content')
+            for i in range(3)
+        )
+        models.Post.tags.through.objects.bulk_create(
+            models.Post.tags.through(post_id=post.id, tag_id=tag.id)
+            for post in posts for tag in self.tags
+        )
+        self.assertCounts(3, 3)
+
+        models.Post.objects.filter(id__in=[p.id for p in posts[:2]]).delete()
+        self.assertCounts(1, 1)
+
+    def test_save_keeps_post_count(self):
+        """Test saving a stale tag keeps the trigger's count."""
+        food = self.tags[0]
+        self._post(food)
+
+        food.name = 'Dinner'
+        food.save()
+
+        food.refresh_from_db()
+        self.assertEqual((food.name, food.post_count), ('Dinner', 1))
+
+    def test_migration_counts_existing_links(self):
+        """Test the migration adding post_count fills it in batches."""
+        food, travel = self.tags
+        self._post(food, travel)
+        self._post(food)
+        models.Tag.objects.update(post_count=0)
+        migration = import_module('core.migrations.0013_tag_post_count')
+
+        with patch.object(migration, 'BACKFILL_BATCH_SIZE', 1):
+            migration.count_existing(apps, None)
+
+        self.assertCounts(2, 1)
+
+    def test_drift_reported(self):
+        """Test removing more links than counted warns, keeping 0."""
+        food = self.tags[0]
+        post = self._post(food)
+        models.Tag.objects.update(post_count=0)
+        connection.ensure_connection()
+        notices = connection.connection.notices
+        del notices[:]
+
+        post.tags.remove(food)
+
+        self.assertCounts(0, 0)
+        self.assertTrue(any(
+            'run reconcile_tag_counts' in notice for notice in notices))
+
+
+class QueryPlanTests(TestCase):
+    """Test hot list queries are served by an index without sorting."""
+
+    def setUp(self):
+        self.user = create_user()
+        models.Post.objects.bulk_create(
+            models.Post(user=self.user, title=f'Post {i}', content='Content')
+            for i in range(50)
+        )
+        # Most posts are other users', as in production.
+        other = create_user(email='other@example.com')
+        models.Post.objects.bulk_create(
+            models.Post(user=other, title=f'Post {i}', content='Content')
+            for i in range(450)
+        )
+        models.Tag.objects.bulk_create(
+            models.Tag(user=self.user, name=f'Tag {i}') for i in range(50)
+        )
+        models.Post.tags.through.objects.bulk_create(
+            models.Post.tags.through(post_id=post.id, tag_id=tag.id)
+            for post in models.Post.objects.all()[:10]
+            for tag in models.Tag.objects.all()[:10]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE core_post')
+            cursor.execute('ANALYZE core_tag')
+            cursor.execute('ANALYZE core_post_tags')
+            # Tiny test tables would otherwise always be read sequentially.
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            # Sorting a few rows is cheap enough that index bloat left by
+            # earlier tests could tip the plan. Where no index provides
+            # the order a Sort still appears.
+            cursor.execute('SET LOCAL enable_sort = off')
+
+    def assertIndexPlan(self, queryset, index_name):
+        """Assert queryset scans index_name and needs no sort step."""
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        self.assertNotIn('Sort', plan)
+
+    def test_post_list_uses_user_id_index(self):
+        """Test user's posts newest first use the composite index"""
+        posts = models.Post.objects.filter(user=self.user).order_by('-id')
+
+        self.assertIndexPlan(posts[:50], 'post_user_id_desc_idx')
+
+    def test_tag_list_uses_user_name_index(self):
+        """Test user's tags by name descending use the unique index"""
+        tags = models.Tag.objects.filter(user=self.user).order_by('-name')
+
+        self.assertIndexPlan(tags, 'unique_tag_name_per_user')
+
+    def test_tag_posts_use_reverse_through_index(self):
+        """Test tag to posts lookups use the (tag_id, post_id) index"""
+        tag = models.Tag.objects.filter(user=self.user).first()
+        post_ids = models.Post.tags.through.objects.filter(
+            tag=tag).order_by('post_id').values('post_id')
+
+        self.assertIndexPlan(post_ids, 'core_post_tags_tag_id_post_id_idx')
+
+    def test_tag_stats_use_post_count_index(self):
+        """Test user's tags by usage use the post count index"""
+        tags = models.Tag.objects.filter(
+            user=self.user).order_by('-post_count', 'name')
+
+        self.assertIndexPlan(tags[:10], 'tag_user_post_count_idx')
@@ -0,0 +1,156 @@
+"""
+Tests for routing reads to a replica database.
+
+The replica alias is a separate test database that nothing replicates
+into, so rows written to one alias only are how a test tells which
+alias served a request.
+"""
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db import replica_reads
+from core.models import ContentVersion, Post
+
+
+POST_URL = reverse('post:post-list')
+ASYNC_POST_URL = reverse('post:async-post-list')
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRoutingTests(TestCase):
+    """Test safe requests read from the replica unless pinned."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = self._create_user('user@example.com')
+        Post.objects.create(user=self.user, title='Primary', content='C')
+        Post.objects.using('replica').create(
+            user=self.user, title='Replica', content='C')
+        self.client = self._client(self.user)
+
+    def _create_user(self, email):
+        """Create a user on both aliases with the same id."""
+        user = get_user_model().objects.create_user(  # type: ignore
+            email=email, password='testpass123')
+        get_user_model().objects.using('replica').create(
+            id=user.id, email=email, password=user.password)
+        return user
+
+    def _client(self, user):
+        """Return a client sending user's token, created on the primary."""
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user)}')
+        return client
+
+    def _titles(self, client=None):
+        res = (client or self.client).get(POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in res.data['results']]
+
+    def test_get_reads_replica(self):
+        """Test a GET is served from the replica."""
+        self.assertEqual(self._titles(), ['Replica'])
+
+    def test_write_pins_to_primary(self):
+        """Test reads after a write see it on the primary."""
+        res = self.client.post(POST_URL, {'title': 'New', 'content': 'C'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self._titles(), ['New', 'Primary'])
+        self.assertFalse(
+            Post.objects.using('replica').filter(title='New').exists())
+
+    @override_settings(READ_YOUR_WRITES_SECONDS=0)
+    def test_pin_expires(self):
+        """Test reads return to the replica after the window."""
+        self.client.post(POST_URL, {'title': 'New', 'content': 'C'})
+
+        self.assertEqual(self._titles(), ['Replica'])
+
+    def test_pin_per_client(self):
+        """Test one client's write does not pin other clients."""
+        other = self._create_user('other@example.com')
+        Post.objects.using('replica').create(
+            user=other, title='Other replica', content='C')
+        other_client = self._client(other)
+
+        self.client.post(POST_URL, {'title': 'New', 'content': 'C'})
+
+        self.assertEqual(self._titles(other_client), ['Other replica'])
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self):
+        """Test reads use the primary without configured replicas."""
+        self.assertEqual(self._titles(), ['Primary'])
+
+    def test_writes_go_to_primary(self):
+        """Test an instance read from the replica is saved to the primary."""
+        with replica_reads(True):
+            post = Post.objects.get(title='Replica')
+        self.assertEqual(post._state.db, 'replica')
+
+        post.title = 'Saved'
+        post.save()
+
+        self.assertTrue(Post.objects.filter(title='Saved').exists())
+        self.assertTrue(
+            Post.objects.using('replica').filter(title='Replica').exists())
+
+    def test_etag_matches_replica_rows(self):
+        """Test the list ETag comes from the alias serving the rows."""
+        Post.objects.create(user=self.user, title='Lagging', content='C')
+        replica_stamp = ContentVersion.objects.using('replica').get(
+            user=self.user)
+
+        res = self.client.get(POST_URL)
+
+        self.assertEqual(
+            [post['title'] for post in res.data['results']], ['Replica'])
+        self.assertEqual(
+            res['ETag'], f'W/"{self.user.id}-{replica_stamp.version}"')
+
+        # Once replicated, the old ETag no longer revalidates.
+        Post.objects.using('replica').create(
+            user=self.user, title='Lagging', content='C')
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._titles(), ['Lagging', 'Replica'])
+
+    @override_settings(ASYNC_DB_WORKERS=0)
+    @patch('core.middleware.pin_to_primary', side_effect=AssertionError)
+    @patch('core.middleware.is_pinned_to_primary', side_effect=AssertionError)
+    def test_async_pins_without_blocking(self, *patched):
+        """Test async requests pin through the async cache API."""
+        token = Token.objects.get(user=self.user)
+        client = AsyncClient()
+
+        async def send(method, **kwargs):
+            # AsyncClient takes raw header names on Django 4.0.
+            return await getattr(client, method)(
+                ASYNC_POST_URL, authorization=f'Token {token}', **kwargs)
+
+        res = async_to_sync(send)('get')
+        self.assertEqual(
+            [post['title'] for post in res.data['results']], ['Replica'])
+
+        res = async_to_sync(send)(
+            'post', data={'title': 'New', 'content': 'C'},
+            content_type='application/json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = async_to_sync(send)('get')
+        self.assertEqual(
+            [post['title'] for post in res.data['results']],
+            ['New', 'Primary'])
@@ -0,0 +1,145 @@
+"""
+Tests for content-addressed storage of post images.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.test import TestCase, override_settings
+
+from core.models import MediaBlob, Post
+from core.storage import ContentAddressedStorage, is_content_name
+
+
+def image_bytes(image_format='PNG'):
+    """Return a small image encoded in image_format."""
+    buffer = BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+DATA = image_bytes()
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+class ContentAddressedStorageTests(TestCase):
+    """Test files are stored once per content and deleted once unused."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_GRACE_SECONDS=0)
+        self.media_settings.enable()
+        self.storage = ContentAddressedStorage()
+        self.user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def _files(self):
+        return sorted(os.listdir(self.storage.path('uploads/post')))
+
+    def test_named_by_content(self):
+        """Test a file is named by the hash of its content."""
+        name = self.storage.save('uploads/post/photo.JPG', ContentFile(DATA))
+
+        # Named by the PNG format found, not the uploaded name.
+        self.assertEqual(name, f'uploads/post/{DIGEST}.png')
+        self.assertTrue(is_content_name(name))
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), DATA)
+        self.assertEqual(
+            os.stat(self.storage.path(name)).st_mode & 0o777, 0o644)
+
+    def test_same_content_stored_once(self):
+        """Test saving equal content again returns the existing file."""
+        first = self.storage.save('uploads/post/a.jpg', ContentFile(DATA))
+        os.utime(self.storage.path(first), (0, 0))
+
+        second = self.storage.save('uploads/post/b.jpeg', ContentFile(DATA))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self._files(), [f'{DIGEST}.png'])
+        # Touched, so the new reference is protected from deletion.
+        self.assertGreater(os.path.getmtime(self.storage.path(first)), 0)
+
+    def test_upload_hashed_by_handler_moved(self):
+        """Test an upload carrying its digest is moved, not copied."""
+        upload = TemporaryUploadedFile('a.jpg', 'image/jpeg', len(DATA), None)
+        upload.write(DATA)
+        upload.flush()
+        upload.content_sha256 = DIGEST
+
+        name = self.storage.save('uploads/post/a.jpg', upload)
+        upload.close()
+
+        self.assertEqual(name, f'uploads/post/{DIGEST}.png')
+        self.assertEqual(self._files(), [f'{DIGEST}.png'])
+
+    def test_extension_from_format(self):
+        """Test names ignore the client's extension."""
+        jpeg = self.storage.save(
+            'uploads/post/photo.png', ContentFile(image_bytes('JPEG')))
+        other = self.storage.save(
+            'uploads/post/evil.html', ContentFile(b'<script></script>'))
+
+        self.assertTrue(jpeg.endswith('.jpg'))
+        self.assertEqual(
+            other, 'uploads/post/'
+            + hashlib.sha256(b'<script></script>').hexdigest())
+        self.assertFalse(is_content_name('uploads/post/' + DIGEST + '.html'))
+
+    def test_ref_count(self):
+        """Test references from post image columns are counted."""
+        name = self.storage.save('uploads/post/a.jpg', ContentFile(DATA))
+        post = Post.objects.create(
+            user=self.user, title='A', content='C', image=name)
+        Post.objects.create(
+            user=self.user, title='B', content='C', image_thumbnail=name)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+
+        Post.objects.filter(id=post.id).update(title='Renamed')
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 2)
+
+        Post.objects.filter(id=post.id).update(image=None)
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 1)
+
+        Post.objects.all().delete()
+        self.assertEqual(MediaBlob.objects.get(name=name).ref_count, 0)
+
+    def test_delete_keeps_referenced_file(self):
+        """Test a file other posts still use is not deleted."""
+        name = self.storage.save('uploads/post/a.jpg', ContentFile(DATA))
+        Post.objects.create(user=self.user, title='A', content='C', image=name)
+
+        self.storage.delete(name)
+
+        self.assertTrue(self.storage.exists(name))
+
+    def test_delete_unreferenced_file(self):
+        """Test a file no post uses is deleted with its count."""
+        name = self.storage.save('uploads/post/a.jpg', ContentFile(DATA))
+        Post.objects.create(user=self.user, title='A', content='C', image=name)
+        Post.objects.all().delete()
+
+        self.storage.delete(name)
+
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.filter(name=name).exists())
+
+    @override_settings(MEDIA_GRACE_SECONDS=60)
+    def test_delete_keeps_fresh_file(self):
+        """Test a file stored within the grace period is kept."""
+        name = self.storage.save('uploads/post/a.jpg', ContentFile(DATA))
+
+        self.storage.delete(name)
+
+        self.assertTrue(self.storage.exists(name))
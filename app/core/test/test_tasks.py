@@ -0,0 +1,37 @@
+"""
+Tests for background task execution.
+"""
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from core import tasks
+
+
+class TaskTests(SimpleTestCase):
+    """Test submitting background tasks."""
+
+    @override_settings(BACKGROUND_WORKERS=0)
+    def test_submit_inline_without_workers(self):
+        """Test tasks run in the calling thread when workers are off."""
+        threads = []
+
+        tasks.submit(lambda: threads.append(threading.current_thread()))
+
+        self.assertEqual(threads, [threading.current_thread()])
+
+    @override_settings(BACKGROUND_WORKERS=1)
+    def test_submit_to_worker_pool(self):
+        """Test tasks run in a worker thread."""
+        future = tasks.submit(lambda: threading.current_thread())
+
+        self.assertNotEqual(future.result(), threading.current_thread())
+
+    @override_settings(BACKGROUND_WORKERS=0)
+    def test_failed_task_logged(self):
+        """Test a failing task is logged instead of raised."""
+        def fail():
+            raise RuntimeError('boom')
+
+        with self.assertLogs('core.tasks', level='ERROR'):
+            tasks.submit(fail)
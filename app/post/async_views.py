@@ -0,0 +1,80 @@
+"""
+Async views serving the post and tag endpoints under ASGI.
+
+Django 4.0 has no async ORM and DRF views are sync. These views look
+the token up through the async cache API and then run the matching
+viewset action, queries and rendering included, in one call on a pool
+of ASYNC_DB_WORKERS threads; a token missing from the cache is checked
+there too. The pool caps the database connections a process opens,
+however many requests are in flight, and lets connections persist
+between requests. Responses are the same as the sync routes.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.db import close_unusable_connections
+from post.views import PostViewSet, TagViewSet
+from user.authentication import CachedTokenAuthentication
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.ASYNC_DB_WORKERS,
+            thread_name_prefix='async-db',
+        )
+    return _executor
+
+
+def _run(view, request, args, kwargs):
+    """Run view on a pool thread, managing its connection per request."""
+    close_old_connections()
+    close_unusable_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_action(viewset_class, actions):
+    """Return an async view running actions of viewset_class."""
+    sync_view = viewset_class.as_view(actions)
+    authenticator = CachedTokenAuthentication()
+
+    async def view(request, *args, **kwargs):
+        try:
+            auth = await authenticator.aauthenticate_cached(request)
+        except AuthenticationFailed:
+            auth = None
+        # Returned by the viewset's CachedTokenAuthentication. Otherwise
+        # it authenticates, or builds the error response, together with
+        # its queries.
+        request.cached_token_auth = auth
+
+        if not settings.ASYNC_DB_WORKERS:
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        return await sync_to_async(
+            _run, thread_sensitive=False, executor=_get_executor(),
+        )(sync_view, request, args, kwargs)
+
+    # csrf_exempt() would wrap the coroutine in a sync function on 4.0.
+    view.csrf_exempt = True
+    return view
+
+
+post_list = async_action(PostViewSet, {'get': 'list', 'post': 'create'})
+post_detail = async_action(PostViewSet, {'get': 'retrieve'})
+tag_list = async_action(TagViewSet, {'get': 'list'})
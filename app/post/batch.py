@@ -0,0 +1,224 @@
+"""
+Batch create, update and delete of posts.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework import serializers, status
+
+from core.models import Post, Tag
+from post.feed import schedule_fan_out, schedule_fan_out_removal
+from post.queries import optimize_post_queryset
+from post.serializers import PostSerializer
+
+
+CREATE, UPDATE, DELETE = 'create', 'update', 'delete'
+
+
+class PostOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a post batch."""
+    op = serializers.ChoiceField(choices=[CREATE, UPDATE, DELETE])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] != CREATE and 'id' not in attrs:
+            raise serializers.ValidationError(
+                {'id': 'This field is required.'})
+        if attrs['op'] != DELETE and 'data' not in attrs:
+            raise serializers.ValidationError(
+                {'data': 'This field is required.'})
+        return attrs
+
+
+class PostBatchResultSerializer(serializers.Serializer):
+    """Serializer describing the outcome of one batch operation."""
+    op = serializers.CharField()
+    status = serializers.IntegerField()
+    id = serializers.IntegerField()
+    data = PostSerializer(required=False)
+
+
+class PostBatchResponseSerializer(serializers.Serializer):
+    """Serializer describing a batch response."""
+    results = PostBatchResultSerializer(many=True)
+
+
+class PostBatchSerializer(serializers.Serializer):
+    """Validate and apply a list of post operations in one transaction.
+
+    Nothing is written unless every operation is valid; errors are
+    reported per operation, in request order.
+    """
+    operations = PostOperationSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.POST_BATCH_MAX_OPERATIONS,
+    )
+
+    def _validate_data(self, operations, indexes, errors, partial):
+        """Validate the data of operations[indexes] as one post list."""
+        if not indexes:
+            return
+        serializer = PostSerializer(
+            data=[operations[i]['data'] for i in indexes],
+            many=True,
+            partial=partial,
+            context=self.context,
+        )
+        if serializer.is_valid():
+            for i, data in zip(indexes, serializer.validated_data):
+                operations[i]['validated_data'] = data
+        else:
+            for i, error in zip(indexes, serializer.errors):
+                if error:
+                    errors[i]['data'] = error
+
+    def validate_operations(self, operations):
+        """Validate post data and look up every targeted post at once."""
+        user = self.context['request'].user
+        errors = [{} for _ in operations]
+        by_op = defaultdict(list)
+        for i, operation in enumerate(operations):
+            by_op[operation['op']].append(i)
+
+        self._validate_data(operations, by_op[CREATE], errors, partial=False)
+        self._validate_data(operations, by_op[UPDATE], errors, partial=True)
+
+        targets = Counter(
+            operation['id'] for operation in operations
+            if operation['op'] != CREATE
+        )
+        posts = Post.objects.filter(
+            user=user, id__in=targets).defer('search_vector').in_bulk()
+        for i in by_op[UPDATE] + by_op[DELETE]:
+            post_id = operations[i]['id']
+            if targets[post_id] > 1:
+                errors[i]['id'] = ['Post appears in more than one operation.']
+            elif post_id not in posts:
+                errors[i]['id'] = ['Not found.']
+            else:
+                operations[i]['instance'] = posts[post_id]
+
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return operations
+
+    def _resolve_tags(self, user, operations):
+        """Return name -> Tag for every tag named in the batch."""
+        names = [
+            tag['name']
+            for operation in operations
+            for tag in operation.get('validated_data', {}).get('tags', [])
+        ]
+        tags = Tag.objects.get_or_create_many(user, names)
+        return {tag.name: tag for tag in tags}
+
+    def _create(self, user, operations, tags):
+        posts, links = [], []
+        for operation in operations:
+            data = dict(operation['validated_data'])
+            names = {tag['name'] for tag in data.pop('tags', [])}
+            posts.append(Post(user=user, **data))
+            links.append(names)
+
+        Post.objects.bulk_create(posts)
+        Post.tags.through.objects.bulk_create(
+            Post.tags.through(post_id=post.id, tag_id=tags[name].id)
+            for post, names in zip(posts, links) for name in names
+        )
+        for operation, post in zip(operations, posts):
+            operation['id'] = post.id
+
+    def _update(self, operations, tags):
+        now = timezone.now()
+        by_fields = defaultdict(list)
+        wanted = {}
+        for operation in operations:
+            post = operation['instance']
+            data = dict(operation['validated_data'])
+            if 'tags' in data:
+                wanted[post.id] = {tags[t['name']].id for t in data['tags']}
+                del data['tags']
+            changed = [
+                attr for attr, value in data.items()
+                if getattr(post, attr) != value
+            ]
+            for attr in changed:
+                setattr(post, attr, data[attr])
+            by_fields[frozenset(changed)].append(post)
+
+        current = defaultdict(dict)
+        rows = Post.tags.through.objects.filter(post_id__in=wanted)
+        for row_id, post_id, tag_id in rows.values_list(
+                'id', 'post_id', 'tag_id'):
+            current[post_id][tag_id] = row_id
+
+        stale, new, retagged = [], [], set()
+        for post_id, tag_ids in wanted.items():
+            have = current[post_id]
+            stale += [row for tag, row in have.items() if tag not in tag_ids]
+            new += [
+                Post.tags.through(post_id=post_id, tag_id=tag_id)
+                for tag_id in tag_ids - have.keys()
+            ]
+            if tag_ids != have.keys():
+                retagged.add(post_id)
+        if stale:
+            Post.tags.through.objects.filter(id__in=stale).delete()
+        if new:
+            Post.tags.through.objects.bulk_create(new)
+
+        for fields, posts in by_fields.items():
+            posts = [p for p in posts if fields or p.id in retagged]
+            for post in posts:
+                post.updated_at = now
+            if posts:
+                Post.objects.bulk_update(posts, [*fields, 'updated_at'])
+
+    def create(self, validated_data):
+        """Apply the operations and return one result per operation."""
+        user = self.context['request'].user
+        operations = validated_data['operations']
+        by_op = defaultdict(list)
+        for operation in operations:
+            by_op[operation['op']].append(operation)
+
+        with transaction.atomic():
+            tags = self._resolve_tags(user, operations)
+            self._create(user, by_op[CREATE], tags)
+            self._update(by_op[UPDATE], tags)
+            deleted = [op['id'] for op in by_op[DELETE]]
+            Post.objects.filter(user=user, id__in=deleted).delete()
+            schedule_fan_out(op['id'] for op in by_op[CREATE])
+            schedule_fan_out_removal(deleted)
+
+        changed = optimize_post_queryset(
+            Post.objects.filter(
+                id__in=[op['id'] for op in by_op[CREATE] + by_op[UPDATE]]),
+            PostSerializer,
+        )
+        data = {
+            post['id']: post
+            for post in PostSerializer(
+                changed, many=True, context=self.context).data
+        }
+        codes = {
+            CREATE: status.HTTP_201_CREATED,
+            UPDATE: status.HTTP_200_OK,
+            DELETE: status.HTTP_204_NO_CONTENT,
+        }
+        results = []
+        for operation in operations:
+            result = {
+                'op': operation['op'],
+                'status': codes[operation['op']],
+                'id': operation['id'],
+            }
+            if operation['id'] in data:
+                result['data'] = data[operation['id']]
+            results.append(result)
+        return results
@@ -0,0 +1,29 @@
+"""
+Conditional GET for list endpoints.
+"""
+from django.utils.cache import get_conditional_response, patch_vary_headers
+
+from core.models import ContentVersion
+
+
+class ConditionalListMixin:
+    """Answer list revalidations from the user's content version.
+
+    The stamp is read before the queryset is built, so a matching
+    If-None-Match returns 304 after one lookup. No Last-Modified is sent:
+    HTTP dates have whole seconds, so a write later in the same second as
+    a fetch would still pass If-Modified-Since.
+    """
+
+    def list(self, request, *args, **kwargs):
+        stamp = ContentVersion.objects.for_user(request.user)
+        etag = f'W/"{stamp.user_id}-{stamp.version}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Authorization'])
+        return response
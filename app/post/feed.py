@@ -0,0 +1,128 @@
+"""
+Community feed: a user's posts and those of the users they follow.
+
+Feeds are materialized per user in TimelineEntry (fan-out on write).
+Creating a post copies it into the timelines of its author and of every
+follower in the background, and deleting it removes the copies. Posts of
+authors with more than FEED_FANOUT_MAX_FOLLOWERS followers are not
+copied but merged in when a feed is read (fan-out on read), so one post
+never writes more than that many rows. An author's posts made while
+above the threshold are only found on read; should they fall back below
+it, those posts drop out of feeds.
+
+Entries of posts deleted without the removal task (cascades from users,
+the admin, failed tasks) are skipped on read and pruned by the
+prune_timelines command.
+"""
+from collections import defaultdict
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+
+from core.models import Follow, Post, TimelineEntry
+from core.tasks import submit_on_commit
+
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def _insert(entries):
+    """Insert (user id, post id) pairs, skipping existing entries."""
+    entries = iter(entries)
+    while batch := list(islice(entries, FANOUT_BATCH_SIZE)):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, post_id=post_id)
+             for user_id, post_id in batch],
+            ignore_conflicts=True,
+        )
+
+
+def fan_out_posts(post_ids):
+    """Copy posts into the timelines of their authors and followers."""
+    posts = Post.objects.filter(id__in=post_ids).values_list(
+        'id', 'user_id', 'user__follower_count__count')
+    by_author = defaultdict(list)
+    own = []
+    for post_id, author_id, follower_count in posts:
+        own.append((author_id, post_id))
+        if (follower_count or 0) <= settings.FEED_FANOUT_MAX_FOLLOWERS:
+            by_author[author_id].append(post_id)
+    _insert(own)
+
+    for author_id, ids in by_author.items():
+        followers = Follow.objects.filter(
+            followee_id=author_id).values_list('follower_id', flat=True)
+        _insert(
+            (follower_id, post_id)
+            for follower_id in followers for post_id in ids
+        )
+
+
+def remove_posts(post_ids):
+    """Remove deleted posts from every timeline."""
+    TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+
+
+def backfill_follow(follower_id, followee_id):
+    """Copy the followee's latest posts into the follower's timeline."""
+    follow = Follow.objects.filter(
+        follower_id=follower_id, followee_id=followee_id,
+    ).values_list('followee__follower_count__count').first()
+    if (follow is None
+            or (follow[0] or 0) > settings.FEED_FANOUT_MAX_FOLLOWERS):
+        # Unfollowed since, or read on demand.
+        return
+
+    post_ids = Post.objects.filter(user_id=followee_id).order_by(
+        '-id').values_list('id', flat=True)[:settings.FEED_BACKFILL_POSTS]
+    _insert((follower_id, post_id) for post_id in post_ids)
+
+
+def remove_follow(follower_id, followee_id):
+    """Remove the followee's posts from the follower's timeline."""
+    if Follow.objects.filter(
+            follower_id=follower_id, followee_id=followee_id).exists():
+        # Followed again since.
+        return
+    TimelineEntry.objects.filter(
+        user_id=follower_id, post__user_id=followee_id).delete()
+
+
+def schedule_fan_out(post_ids):
+    """Fan new posts out once the current transaction commits."""
+    submit_on_commit(fan_out_posts, list(post_ids))
+
+
+def schedule_fan_out_removal(post_ids):
+    """Remove deleted posts from timelines once the deletion commits."""
+    submit_on_commit(remove_posts, list(post_ids))
+
+
+def schedule_follow(follower_id, followee_id):
+    """Backfill the follower's timeline once the follow commits."""
+    submit_on_commit(backfill_follow, follower_id, followee_id)
+
+
+def schedule_unfollow(follower_id, followee_id):
+    """Clean the follower's timeline once the unfollow commits."""
+    submit_on_commit(remove_follow, follower_id, followee_id)
+
+
+def feed_post_ids(user, before, limit):
+    """Return up to limit ids of user's feed below before, newest first."""
+    entries = TimelineEntry.objects.filter(
+        Exists(Post.objects.filter(id=OuterRef('post_id'))), user=user)
+    pulled = Post.objects.filter(user__in=Follow.objects.filter(
+        follower=user,
+        followee__follower_count__count__gt=(
+            settings.FEED_FANOUT_MAX_FOLLOWERS),
+    ).values('followee_id'))
+    if before is not None:
+        entries = entries.filter(post_id__lt=before)
+        pulled = pulled.filter(id__lt=before)
+
+    ids = set(entries.order_by('-post_id').values_list(
+        'post_id', flat=True)[:limit])
+    ids.update(pulled.order_by('-id').values_list('id', flat=True)[:limit])
+    return sorted(ids, reverse=True)[:limit]
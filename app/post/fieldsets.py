@@ -0,0 +1,66 @@
+"""
+Sparse fieldsets for read requests.
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _split(value):
+    """Return the names in a comma separated query parameter."""
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """Trim read responses to ?fields= and ?expand=.
+
+    Relations named in expandable_fields are left out of a ?fields=
+    selection unless expanded, so a client asking for a few columns
+    never pays for the join. The selection is exposed through
+    get_sparse_fields() for get_queryset() to project in SQL.
+    """
+    expandable_fields = ()
+
+    def get_sparse_fields(self):
+        """Return the selected field names, or None for every field."""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self._parse_sparse_fields()
+        return self._sparse_fields
+
+    def _parse_sparse_fields(self):
+        params = self.request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+
+        available = list(self.get_serializer_class().Meta.fields)
+        expand = _split(params.get('expand', ''))
+        unknown = set(expand) - set(self.expandable_fields)
+        if unknown:
+            raise ValidationError(
+                {'expand': f'Unknown fields: {", ".join(sorted(unknown))}.'})
+
+        if 'fields' in params:
+            selected = _split(params['fields'])
+            unknown = set(selected) - set(available)
+            if unknown:
+                raise ValidationError({
+                    'fields': f'Unknown fields: {", ".join(sorted(unknown))}.'
+                })
+        else:
+            selected = [
+                name for name in available
+                if name not in self.expandable_fields
+            ]
+
+        selected = set(selected) | set(expand)
+        return [name for name in available if name in selected]
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
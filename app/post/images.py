@@ -0,0 +1,63 @@
+"""
+Image processing pipeline for post images.
+"""
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.core.files.base import ContentFile
+
+from core.models import Post, post_image_path
+from core.tasks import submit_on_commit
+
+
+# Field name -> bounding box of the variant stored in it.
+VARIANTS = {
+    'image_thumbnail': (320, 320),
+    'image_medium': (1280, 1280),
+}
+VARIANT_FORMAT = 'WEBP'
+VARIANT_EXTENSION = '.webp'
+VARIANT_QUALITY = 80
+
+
+def render_variant(image, size):
+    """Return image shrunk to fit size, re-encoded without metadata."""
+    variant = image.copy()
+    variant.thumbnail(size)
+    if variant.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in variant.getbands() or 'transparency' in variant.info
+        variant = variant.convert('RGBA' if has_alpha else 'RGB')
+
+    buffer = BytesIO()
+    # Nothing from image.info is passed on, so EXIF and ICC data are dropped.
+    variant.save(buffer, format=VARIANT_FORMAT, quality=VARIANT_QUALITY)
+    return buffer.getvalue()
+
+
+def process_post_image(post_id, image_name):
+    """Store the resized variants of a post's image."""
+    post = Post.objects.filter(id=post_id, image=image_name).only(
+        'id', 'image').first()
+    if post is None:
+        # The post was deleted or got a new image since this was queued.
+        return
+
+    storage = post.image.storage
+    names = {}
+    with post.image.open('rb') as image_file, Image.open(image_file) as image:
+        image = ImageOps.exif_transpose(image)
+        for field, size in VARIANTS.items():
+            content = ContentFile(render_variant(image, size))
+            names[field] = storage.save(
+                post_image_path(post, field + VARIANT_EXTENSION), content)
+
+    updated = Post.objects.filter(id=post_id, image=image_name).update(**names)
+    if not updated:
+        for name in names.values():
+            storage.delete(name)
+
+
+def schedule_post_image_processing(post):
+    """Process post's image in the background after the upload commits."""
+    submit_on_commit(process_post_image, post.id, post.image.name)
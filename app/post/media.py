@@ -0,0 +1,59 @@
+"""
+Delivery of uploaded media after the API has checked access.
+
+The transfer itself is left to the front proxy where one is configured:
+MEDIA_ACCEL = 'nginx' answers with an X-Accel-Redirect to an internal
+location that aliases MEDIA_ROOT, and 'sendfile' with an X-Sendfile
+header (Apache, lighttpd). Without one the file is streamed by
+FileResponse, which WSGI servers hand to sendfile() where they can.
+"""
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+
+from core.models import POST_IMAGE_FIELDS, Post
+from core.storage import content_type, post_image_storage
+
+
+def visible_posts(user):
+    """Return posts whose images user may see: own and followed users'."""
+    return Post.objects.filter(
+        Q(user=user) | Q(user__followers__follower=user))
+
+
+def media_post_exists(user, name):
+    """Return whether name is an image of a post visible to user."""
+    stored = Q()
+    for field in POST_IMAGE_FIELDS:
+        stored |= Q(**{field: name})
+    return visible_posts(user).filter(stored).exists()
+
+
+def media_response(name):
+    """Return a response delivering the stored file name."""
+    # From the extension core.storage derived from the image format,
+    # never guessed, so no file is served as HTML or script.
+    mime_type = content_type(name)
+    if settings.MEDIA_ACCEL in ('nginx', 'sendfile'):
+        # The proxy keeps these headers and replaces the empty body.
+        response = HttpResponse(content_type=mime_type)
+        if settings.MEDIA_ACCEL == 'nginx':
+            response['X-Accel-Redirect'] = (
+                settings.MEDIA_ACCEL_PREFIX + quote(name))
+        else:
+            response['X-Sendfile'] = post_image_storage.path(name)
+    else:
+        try:
+            response = FileResponse(
+                post_image_storage.open(name, 'rb'), content_type=mime_type)
+        except FileNotFoundError:
+            raise Http404('File not found.')
+
+    # Names are random or content hashes, so a stored file never changes.
+    patch_cache_control(
+        response, private=True, immutable=True,
+        max_age=settings.MEDIA_CACHE_SECONDS)
+    return response
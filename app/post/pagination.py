@@ -0,0 +1,59 @@
+"""
+Pagination classes for Post API
+"""
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination)
+
+
+class PostCursorPagination(CursorPagination):
+    """Keyset pagination over post ids, newest first."""
+    ordering = '-id'
+    page_size = settings.POST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.POST_MAX_PAGE_SIZE
+
+
+class PostSearchPagination(PageNumberPagination):
+    """Page number pagination for ranked search results.
+
+    Rank is not a stable, unique key, so search cannot use a cursor.
+    """
+    page_size = settings.POST_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.POST_MAX_PAGE_SIZE
+
+
+class FeedCursorPagination(PostCursorPagination):
+    """Keyset pagination over feed post ids, newest first.
+
+    The feed merges ids from several sources, so pages are fetched by a
+    callable rather than by filtering a queryset. Feeds are read forward
+    only; previous is always null.
+    """
+
+    def paginate_ids(self, fetch_ids, request):
+        """Return the page of ids fetch_ids(before, limit) yields."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        try:
+            before = int(cursor.position) if cursor else None
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        ids = fetch_ids(before, self.page_size + 1)
+        self.has_next = len(ids) > self.page_size
+        self.page = ids[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=False, position=self.page[-1]))
+
+    def get_previous_link(self):
+        return None
@@ -0,0 +1,49 @@
+"""
+Queryset optimization for Post API
+"""
+from django.db.models import Prefetch
+
+from core.models import Post, Tag
+
+
+def _columns(model, field_names):
+    """Return the concrete columns of model backing field_names."""
+    columns = {model._meta.pk.name}
+    for name in field_names:
+        field = model._meta.get_field(name)
+        if field.concrete and not field.many_to_many:
+            columns.add(field.name)
+    return columns
+
+
+def _serializer_fields(serializer_class):
+    """Return the field names declared on serializer_class."""
+    return list(getattr(serializer_class.Meta, 'fields', []))
+
+
+def optimize_post_queryset(queryset, serializer_class, defer=True,
+                           fields=None):
+    """Prefetch tags and select only the columns the serializer reads.
+
+    fields narrows the serializer's fields to a sparse fieldset. Deferring
+    columns is only safe for read-only requests: saving an instance with
+    deferred fields skips them, including auto_now ones.
+    """
+    if fields is None:
+        fields = _serializer_fields(serializer_class)
+
+    if 'tags' in fields:
+        tag_serializer = serializer_class._declared_fields['tags'].child
+        tags = Tag.objects.order_by('id')
+        if defer:
+            tags = tags.only(
+                *_columns(Tag, _serializer_fields(type(tag_serializer))))
+        queryset = queryset.prefetch_related(Prefetch('tags', queryset=tags))
+
+    if defer:
+        queryset = queryset.only(*_columns(Post, fields))
+    else:
+        # Maintained by a database trigger, never read or written here.
+        queryset = queryset.defer('search_vector')
+
+    return queryset
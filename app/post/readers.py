@@ -0,0 +1,151 @@
+"""
+Read-only list serialization straight from values() rows.
+
+ModelSerializer builds a field tree, resolves attributes and wraps every
+row in an OrderedDict. For the plain fields used by the list endpoints the
+output is a known function of the column values, so the reader compiles a
+serializer once into column names and converters and builds the same
+dicts from values() rows. Serializers using anything else fall back to
+DRF.
+"""
+from collections import defaultdict
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def _file_converter(field, model_field, request):
+    """Mirror FileField.to_representation for a stored file name."""
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+    storage = model_field.storage
+
+    def convert(name):
+        if not name:
+            return None
+        if not use_url:
+            return name
+        url = storage.url(name)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    return convert
+
+
+# Fields whose to_representation returns database values unchanged.
+PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField)
+
+
+@lru_cache(maxsize=None)
+def _supported(serializer_class):
+    """Return whether the reader reproduces serializer_class output."""
+    return (
+        issubclass(serializer_class, serializers.ModelSerializer)
+        and serializer_class.to_representation
+        is serializers.Serializer.to_representation
+    )
+
+
+class ListReader:
+    """Compiled reader for one ModelSerializer instance."""
+
+    def __init__(self, columns, fields, nested):
+        self.columns = columns
+        self.fields = fields
+        self.nested = nested
+
+    @classmethod
+    def compile(cls, serializer):
+        """Return a reader for serializer, or None if DRF must render."""
+        if not _supported(type(serializer)):
+            return None
+        model = serializer.Meta.model
+        request = serializer.context.get('request')
+        columns, fields, nested = [model._meta.pk.attname], [], {}
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if '.' in field.source or field.source == '*':
+                return None
+            model_field = model._meta.get_field(field.source)
+
+            if isinstance(field, serializers.ListSerializer):
+                child = cls.compile(field.child)
+                if child is None or not model_field.many_to_many:
+                    return None
+                nested[name] = (model_field, child)
+                fields.append((name, None, None))
+            elif isinstance(field, serializers.FileField):
+                columns.append(model_field.attname)
+                fields.append((name, model_field.attname, _file_converter(
+                    field, model_field, request)))
+            elif type(field) in PLAIN_FIELDS and model_field.concrete:
+                columns.append(model_field.attname)
+                fields.append((name, model_field.attname, None))
+            else:
+                return None
+
+        return cls(list(dict.fromkeys(columns)), fields, nested)
+
+    def _build(self, row, related):
+        data = {}
+        for name, column, convert in self.fields:
+            if column is None:
+                data[name] = related[name].get(row[self.columns[0]], [])
+            else:
+                value = row[column]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                data[name] = value
+        return data
+
+    def _related(self, ids):
+        """Load every nested list for ids with one query per relation."""
+        related = {}
+        for name, (model_field, child) in self.nested.items():
+            through = model_field.remote_field.through
+            source = model_field.m2m_field_name()
+            target = model_field.m2m_reverse_field_name()
+            prefix = f'{target}__'
+            rows = (
+                through.objects
+                .filter(**{f'{source}_id__in': ids})
+                .order_by(f'{target}_id')
+                .values(f'{source}_id', *(prefix + c for c in child.columns))
+            )
+            grouped = defaultdict(list)
+            for row in rows:
+                grouped[row[f'{source}_id']].append(child._build(
+                    {c: row[prefix + c] for c in child.columns}, {}))
+            related[name] = grouped
+        return related
+
+    def values(self, queryset):
+        """Return queryset reduced to the reader's columns."""
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def read(self, rows):
+        """Build the serialized dicts for values() rows."""
+        rows = list(rows)
+        related = {}
+        if self.nested and rows:
+            related = self._related([row[self.columns[0]] for row in rows])
+        return [self._build(row, related) for row in rows]
+
+
+class ValuesListMixin:
+    """Serve list from values() rows when the serializer allows it."""
+
+    def list(self, request, *args, **kwargs):
+        reader = ListReader.compile(self.get_serializer(many=True).child)
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.read(page))
+        return Response(reader.read(rows))
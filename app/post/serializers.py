@@ -3,6 +3,7 @@
 from rest_framework import serializers
 
 from core.models import Post, Tag
+from post.uploads import HeaderValidatedImageField
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -13,6 +14,25 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
         read_only_fields = ['id']
 
+    def validate_name(self, value):
+        """Reject renaming a tag to a name the user already has."""
+        if self.instance is not None:
+            taken = Tag.objects.filter(
+                user=self.instance.user, name=value
+            ).exclude(id=self.instance.id).exists()
+            if taken:
+                raise serializers.ValidationError(
+                    'You already have a tag with this name.')
+        return value
+
+
+class TagStatsSerializer(TagSerializer):
+    """Serializer for tags with their number of posts."""
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['post_count']
+        read_only_fields = fields
+
 
 class PostSerializer(serializers.ModelSerializer):
     """Serializer for posts"""
@@ -20,36 +40,55 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['id', 'title', 'content', 'tags']
-        read_only_fields = ['id']
+        fields = [
+            'id', 'title', 'content', 'tags',
+            'image_thumbnail', 'image_medium',
+        ]
+        read_only_fields = ['id', 'image_thumbnail', 'image_medium']
 
     def _get_or_create_tags(self, tags, post):
         """Handle getting or creating tags as needed."""
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=self.context['request'].user,
-                **tag
-            )
-            post.tags.add(tag_obj)
+        tag_objs = Tag.objects.get_or_create_many(
+            self.context['request'].user,
+            [tag['name'] for tag in tags],
+        )
+        post.tags.add(*tag_objs)
+
+    def _set_tags(self, tags, post):
+        """Apply only the tag changes; return whether any were made."""
+        tag_objs = Tag.objects.get_or_create_many(
+            self.context['request'].user,
+            [tag['name'] for tag in tags],
+        )
+        current = {tag.id for tag in post.tags.all()}
+        wanted = {tag.id for tag in tag_objs}
+        if current - wanted:
+            post.tags.remove(*(current - wanted))
+        if wanted - current:
+            post.tags.add(*(wanted - current))
+        return current != wanted
 
     def create(self, validated_data):
-        """Create a recipe."""
+        """Create a post."""
         tags = validated_data.pop('tags', [])
         post = Post.objects.create(**validated_data)
         self._get_or_create_tags(tags, post)
         return post
 
     def update(self, instance, validated_data):
-        """Update recipe."""
+        """Update post, writing only the columns that changed."""
         tags = validated_data.pop('tags', None)
-        if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+        tags_changed = tags is not None and self._set_tags(tags, instance)
 
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
+        changed = [
+            attr for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        ]
+        for attr in changed:
+            setattr(instance, attr, validated_data[attr])
 
-        instance.save()
+        if changed or tags_changed:
+            instance.save(update_fields=changed + ['updated_at'])
         return instance
 
 
@@ -60,11 +99,25 @@ class PostDetailSerializer(PostSerializer):
         fields = PostSerializer.Meta.fields + ['created_at', 'updated_at']
 
 
+class FeedPostSerializer(PostSerializer):
+    """Serializer for posts in the community feed"""
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ['user', 'created_at']
+        read_only_fields = fields
+
+
 class PostImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading image to post"""
+    image = HeaderValidatedImageField(required=True)
 
     class Meta:
         model = Post
         fields = ['id', 'image']
         read_only_fields = ['id']
-        extra_kwargs = {'image': {'required': 'True'}}
+
+    def update(self, instance, validated_data):
+        """Replace the image, dropping variants of the previous one."""
+        instance.image_thumbnail = None
+        instance.image_medium = None
+        return super().update(instance, validated_data)
@@ -0,0 +1,139 @@
+"""
+Tests for the async post and tag views.
+"""
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import (
+    AsyncClient, TestCase, TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+
+
+POST_URL = reverse('post:post-list')
+ASYNC_POST_URL = reverse('post:async-post-list')
+ASYNC_TAGS_URL = reverse('post:async-tag-list')
+
+
+def async_detail_url(post_id):
+    """Return the async post detail url."""
+    return reverse('post:async-post-detail', args=[post_id])
+
+
+@override_settings(ASYNC_DB_WORKERS=0)
+class AsyncPostApiTests(TestCase):
+    """Test async views answer like the sync viewsets."""
+
+    def setUp(self):
+        caches[settings.AUTH_TOKEN_CACHE].clear()
+        self.user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        token = Token.objects.create(user=self.user)
+        self.authorization = f'Token {token.key}'
+        self.client = AsyncClient()
+
+        self.post = Post.objects.create(
+            user=self.user, title='Title', content='Content')
+        self.tag = Tag.objects.create(user=self.user, name='Food')
+        self.post.tags.add(self.tag)
+
+    def _request(self, method, url, **kwargs):
+        """Send a request through the ASGI handler."""
+        if self.authorization:
+            # AsyncClient takes raw header names on Django 4.0.
+            kwargs['authorization'] = self.authorization
+
+        async def send():
+            return await getattr(self.client, method)(url, **kwargs)
+
+        return async_to_sync(send)()
+
+    def test_auth_required(self):
+        """Test requests without a valid token are rejected."""
+        self.authorization = None
+        res = self._request('get', ASYNC_POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.authorization = 'Token invalid'
+        res = self._request('get', ASYNC_POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_matches_sync(self):
+        """Test async list returns the same body as the viewset."""
+        res = self._request('get', ASYNC_POST_URL)
+
+        sync_client = APIClient()
+        sync_client.credentials(HTTP_AUTHORIZATION=self.authorization)
+        expected = sync_client.get(POST_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content, expected.content)
+
+    def test_list_cached_token_queries(self):
+        """Test a cached token costs no query on the async path."""
+        self._request('get', ASYNC_POST_URL)
+
+        with self.assertNumQueries(3):  # version stamp, posts, tags
+            res = self._request('get', ASYNC_POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_retrieve(self):
+        """Test retrieving a post."""
+        res = self._request(
+            'get', async_detail_url(self.post.id))  # type: ignore
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['title'], 'Title')
+
+    def test_create(self):
+        """Test creating a post with tags."""
+        res = self._request(
+            'post',
+            ASYNC_POST_URL,
+            data={'title': 'New', 'content': 'Post',
+                  'tags': [{'name': 'Food'}]},
+            content_type='application/json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        post = Post.objects.get(id=res.json()['id'])
+        self.assertEqual(post.user, self.user)
+        self.assertEqual(list(post.tags.all()), [self.tag])
+
+    def test_tag_list(self):
+        """Test listing tags."""
+        res = self._request('get', ASYNC_TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), [{'id': self.tag.id, 'name': 'Food'}])
+
+
+@override_settings(ASYNC_DB_WORKERS=2)
+class AsyncPoolTests(TransactionTestCase):
+    """Test async views running on the database worker pool."""
+
+    def test_list_on_pool(self):
+        """Test the pool serves requests with its own connections."""
+        user = get_user_model().objects.create_user(  # type: ignore
+            email='user@example.com', password='testpass123')
+        token = Token.objects.create(user=user)
+        Tag.objects.create(user=user, name='Food')
+
+        async def send():
+            client = AsyncClient()
+            return [
+                await client.get(
+                    ASYNC_TAGS_URL, authorization=f'Token {token.key}')
+                for _ in range(3)
+            ]
+
+        for res in async_to_sync(send)():
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.json()[0]['name'], 'Food')
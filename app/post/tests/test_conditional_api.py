@@ -0,0 +1,140 @@
+"""
+Tests for conditional GET on the post and tag lists.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.test import TestCase
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import ContentVersion, Post, Tag
+
+
+POST_URL = reverse('post:post-list')
+TAGS_URL = reverse('post:tag-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password=password)  # type: ignore # noqa
+
+
+def create_post(user, **params):
+    """Create and return a post."""
+    return Post.objects.create(
+        user=user, title='Post Title', content='Post content', **params)
+
+
+class ConditionalListTests(TestCase):
+    """Test ETag revalidation of list endpoints."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.post = create_post(self.user)
+        self.tag = Tag.objects.create(user=self.user, name='Food')
+        self.post.tags.add(self.tag)
+
+    def _etag(self, url=POST_URL):
+        """Fetch url in full and return its ETag."""
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res['ETag']
+
+    def _assert_changed(self, etag, url=POST_URL):
+        """Assert url no longer matches etag."""
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_list_sends_validators(self):
+        """Test list responses carry an ETag and no Last-Modified."""
+        res = self.client.get(POST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('W/"'))
+        self.assertNotIn('Last-Modified', res)
+        self.assertIn('no-cache', res['Cache-Control'])
+        self.assertIn('Authorization', res['Vary'])
+
+    def test_post_list_not_modified_one_query(self):
+        """Test a matching If-None-Match skips the post queries."""
+        etag = self._etag()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_tag_list_not_modified_one_query(self):
+        """Test a matching If-None-Match skips the tag query."""
+        etag = self._etag(TAGS_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_if_modified_since_ignored(self):
+        """Test If-Modified-Since alone never answers 304.
+
+        Writes within the second of a fetch would be missed.
+        """
+        res = self.client.get(
+            POST_URL, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_post_api_write_changes_etag(self):
+        """Test creating a post through the API changes the ETag."""
+        etag = self._etag()
+
+        self.client.post(POST_URL, {'title': 'New', 'content': 'Post'})
+
+        self._assert_changed(etag)
+
+    def test_bulk_writes_change_etag(self):
+        """Test writes that bypass model signals still change the ETag."""
+        writes = [
+            lambda: Post.objects.bulk_create(
+                [Post(user=self.user, title='Bulk', content='Post')]),
+            lambda: Post.objects.filter(user=self.user).update(title='New'),
+            lambda: self.post.tags.clear(),
+            lambda: Tag.objects.filter(id=self.tag.id).update(name='Meal'),
+            lambda: Post.objects.filter(user=self.user).delete(),
+        ]
+        for write in writes:
+            etag = self._etag()
+            write()
+            self._assert_changed(etag)
+
+    def test_tag_write_changes_tag_list_etag(self):
+        """Test deleting a tag changes the tag list ETag."""
+        etag = self._etag(TAGS_URL)
+
+        self.tag.delete()
+
+        self._assert_changed(etag, TAGS_URL)
+
+    def test_other_user_writes_keep_etag(self):
+        """Test another user's writes do not invalidate the list."""
+        other = create_user(email='other@example.com')
+        etag = self._etag()
+
+        create_post(other).tags.add(Tag.objects.create(user=other, name='X'))
+
+        res = self.client.get(POST_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_version_created_with_user(self):
+        """Test every new user starts with a version stamp."""
+        user = create_user(email='new@example.com')
+
+        self.assertEqual(ContentVersion.objects.get(user=user).version, 1)
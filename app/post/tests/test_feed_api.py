@@ -0,0 +1,247 @@
+"""
+Tests for the community feed and following users.
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Follow, FollowerCount, Post, TimelineEntry
+
+
+FEED_URL = reverse('post:feed')
+POST_URL = reverse('post:post-list')
+
+
+def follow_url(user_id):
+    """Return the url following user_id."""
+    return reverse('user:follow', args=[user_id])
+
+
+def create_user(email):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(  # type: ignore
+        email=email, password='testpass123')
+
+
+class PublicFeedApiTests(TestCase):
+    """Test unauthenticated feed requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to read the feed."""
+        res = APIClient().get(FEED_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(BACKGROUND_WORKERS=0)
+class FeedApiTests(TestCase):
+    """Test the feed of authenticated users."""
+
+    def setUp(self):
+        self.user = create_user('user@example.com')
+        self.author = create_user('author@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.author_client = APIClient()
+        self.author_client.force_authenticate(self.author)
+
+    def _commit(self, method, url, **kwargs):
+        """Send a request and run its on commit tasks."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return method(url, **kwargs)
+
+    def _feed_ids(self, **params):
+        res = self.client.get(FEED_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in res.data['results']]
+
+    def _create_post(self, title='Post'):
+        res = self._commit(
+            self.author_client.post, POST_URL,
+            data={'title': title, 'content': 'Content'})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def _follower_count(self):
+        return FollowerCount.objects.get(user=self.author).count
+
+    def test_follow_backfills_posts(self):
+        """Test following copies the followee's latest posts."""
+        posts = [
+            Post.objects.create(user=self.author, title=f'{i}', content='C')
+            for i in range(3)
+        ]
+
+        res = self._commit(self.client.post, follow_url(self.author.id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['followee'], self.author.id)
+        self.assertEqual(
+            self._feed_ids(), [post.id for post in reversed(posts)])
+        self.assertEqual(self._follower_count(), 1)
+
+    def test_user_save_keeps_follower_count(self):
+        """Test saving a stale user keeps the trigger's count."""
+        stale = get_user_model().objects.get(id=self.author.id)
+        self._commit(self.client.post, follow_url(self.author.id))
+
+        stale.name = 'Renamed'
+        stale.save()
+
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.name, 'Renamed')
+        self.assertEqual(self._follower_count(), 1)
+
+    def test_follow_twice(self):
+        """Test following again keeps one follow."""
+        self._commit(self.client.post, follow_url(self.author.id))
+
+        res = self._commit(self.client.post, follow_url(self.author.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_cannot_follow_self(self):
+        """Test following yourself is rejected."""
+        res = self.client.post(follow_url(self.user.id))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_follow_unknown_user(self):
+        """Test following a missing user is a 404."""
+        res = self.client.post(follow_url(self.author.id + 100))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_new_post_fans_out(self):
+        """Test a new post reaches the author's and followers' feeds."""
+        self._commit(self.client.post, follow_url(self.author.id))
+
+        post_id = self._create_post()
+
+        self.assertEqual(self._feed_ids(), [post_id])
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(post_id=post_id)
+                .values_list('user_id', flat=True)),
+            {self.user.id, self.author.id})
+        res = self.client.get(FEED_URL)
+        self.assertEqual(res.data['results'][0]['user'], self.author.id)
+
+    def test_own_posts_in_feed(self):
+        """Test users see their own posts."""
+        res = self._commit(
+            self.client.post, POST_URL,
+            data={'title': 'Mine', 'content': 'Content'})
+
+        self.assertEqual(self._feed_ids(), [res.data['id']])
+
+    def test_batch_create_fans_out(self):
+        """Test posts created by the batch endpoint fan out."""
+        self._commit(self.client.post, follow_url(self.author.id))
+
+        res = self._commit(
+            self.author_client.post, reverse('post:post-batch'),
+            data={'operations': [
+                {'op': 'create', 'data': {'title': 'A', 'content': 'C'}},
+            ]},
+            format='json')
+
+        self.assertEqual(
+            self._feed_ids(), [res.data['results'][0]['id']])
+
+    def test_deleted_post_removed(self):
+        """Test deleting a post removes it from timelines."""
+        self._commit(self.client.post, follow_url(self.author.id))
+        post_id = self._create_post()
+
+        self._commit(
+            self.author_client.delete,
+            reverse('post:post-detail', args=[post_id]))
+
+        self.assertEqual(self._feed_ids(), [])
+        self.assertFalse(TimelineEntry.objects.filter(post_id=post_id))
+
+    def test_cascade_deleted_posts_skipped(self):
+        """Test posts deleted with their author do not shorten pages."""
+        other = create_user('other@example.com')
+        other_client = APIClient()
+        other_client.force_authenticate(other)
+        self._commit(self.client.post, follow_url(self.author.id))
+        self._commit(self.client.post, follow_url(other.id))
+        post_ids = [
+            self._commit(
+                other_client.post, POST_URL,
+                data={'title': f'Other {i}', 'content': 'C'}).data['id']
+            for i in range(2)
+        ]
+        for i in range(4):
+            self._create_post(f'Post {i}')
+
+        self.author.delete()
+
+        self.assertTrue(TimelineEntry.objects.filter(
+            post_id__gt=post_ids[-1]).exists())
+        res = self.client.get(FEED_URL, {'page_size': 2})
+        self.assertEqual(
+            [post['id'] for post in res.data['results']],
+            sorted(post_ids, reverse=True))
+        self.assertIsNone(res.data['next'])
+
+    def test_unfollow_removes_posts(self):
+        """Test unfollowing drops the followee's posts from the feed."""
+        self._commit(self.client.post, follow_url(self.author.id))
+        self._create_post()
+
+        res = self._commit(self.client.delete, follow_url(self.author.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._feed_ids(), [])
+        self.assertEqual(self._follower_count(), 0)
+
+    def test_cursor_pagination(self):
+        """Test the feed is paged by cursor without gaps or repeats."""
+        self._commit(self.client.post, follow_url(self.author.id))
+        post_ids = [self._create_post(f'Post {i}') for i in range(5)]
+
+        seen, url = [], FEED_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            seen += [post['id'] for post in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(seen, sorted(post_ids, reverse=True))
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is a 404."""
+        res = self.client.get(FEED_URL, {'cursor': 'bad'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_popular_author_read_on_demand(self):
+        """Test posts of authors over the threshold are merged on read."""
+        self._commit(self.client.post, follow_url(self.author.id))
+        own = self._commit(
+            self.client.post, POST_URL,
+            data={'title': 'Mine', 'content': 'Content'}).data['id']
+        post_id = self._create_post()
+
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.user, post_id=post_id))
+        self.assertEqual(self._feed_ids(), [post_id, own])
+        self.assertEqual(self._feed_ids(page_size=1), [post_id])
+
+    def test_feed_queries(self):
+        """Test a feed page costs a fixed number of queries."""
+        self._commit(self.client.post, follow_url(self.author.id))
+        for i in range(3):
+            self._create_post(f'Post {i}')
+
+        # timeline ids, popular authors' ids, posts, tags
+        with self.assertNumQueries(4):
+            self.client.get(FEED_URL)
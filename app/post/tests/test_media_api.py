@@ -0,0 +1,150 @@
+"""
+Tests for serving post images.
+"""
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Follow, Post
+
+
+NAME = 'uploads/post/a6e1c2d4.jpg'
+
+
+def media_url(name):
+    """Return the url serving the media file name."""
+    return reverse('media', args=[name])
+
+
+def create_user(email):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(  # type: ignore
+        email=email, password='testpass123')
+
+
+class MediaApiTests(TestCase):
+    """Test access checks and delivery of media files."""
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings = override_settings(MEDIA_ROOT=media_root.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        path = os.path.join(media_root.name, NAME)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as image_file:
+            image_file.write(b'image data')
+        self.path = path
+
+        self.owner = create_user('owner@example.com')
+        self.user = create_user('user@example.com')
+        Post.objects.create(
+            user=self.owner, title='Post', content='C', image=NAME)
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def _get(self, user=None, name=NAME):
+        client = self.client
+        if user is not None:
+            client = APIClient()
+            client.force_authenticate(user)
+        res = client.get(media_url(name))
+        if res.streaming:
+            # Reading to the end closes the file.
+            res.body = b''.join(res.streaming_content)
+        return res
+
+    def test_auth_required(self):
+        """Test media is not served to anonymous requests."""
+        res = APIClient().get(media_url(NAME))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_owner_gets_file(self):
+        """Test the owner receives the file with immutable caching."""
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.body, b'image data')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        cache_control = res['Cache-Control'].split(', ')
+        self.assertIn('immutable', cache_control)
+        self.assertIn('private', cache_control)
+        self.assertIn('max-age=31536000', cache_control)
+
+    def test_follower_gets_file(self):
+        """Test followers of the owner can load the image from the feed."""
+        Follow.objects.create(follower=self.user, followee=self.owner)
+
+        res = self._get(self.user)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_user_not_found(self):
+        """Test other users' images are hidden."""
+        res = self._get(self.user)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_variant_served(self):
+        """Test resized variants are served like the image."""
+        Post.objects.update(image=None, image_thumbnail=NAME)
+
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_unreferenced_file_not_found(self):
+        """Test files no post references are not served."""
+        Post.objects.update(image=None)
+
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_file_not_found(self):
+        """Test a referenced file missing from disk is a 404."""
+        os.remove(self.path)
+
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_content_type_not_guessed(self):
+        """Test files not named by image format are not served as such."""
+        name = 'uploads/post/evil.html'
+        os.rename(self.path, self.path.replace('a6e1c2d4.jpg', 'evil.html'))
+        Post.objects.update(image=name)
+
+        res = self._get(name=name)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/octet-stream')
+
+    @override_settings(MEDIA_ACCEL='nginx')
+    def test_x_accel_redirect(self):
+        """Test nginx is handed the internal location to send."""
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'], '/protected-media/' + NAME)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertEqual(res.content, b'')
+
+    @override_settings(MEDIA_ACCEL='sendfile')
+    def test_x_sendfile(self):
+        """Test the server is handed the file path to send."""
+        res = self._get()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Sendfile'], self.path)
+        self.assertEqual(res.content, b'')
@@ -0,0 +1,163 @@
+"""
+Tests for the post batch API.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+
+from post.batch import PostBatchSerializer
+
+
+BATCH_URL = reverse('post:post-batch')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)  # type: ignore
+
+
+def create_post(user, **params):
+    """Create and return a sample post."""
+    defaults = {'title': 'Sample title', 'content': 'Sample content'}
+    defaults.update(params)
+    return Post.objects.create(user=user, **defaults)
+
+
+class PostBatchApiTests(TestCase):
+    """Test applying batches of post operations."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def _batch(self, operations):
+        return self.client.post(
+            BATCH_URL, {'operations': operations}, format='json')
+
+    def test_auth_required(self):
+        """Test auth is required for batches."""
+        res = APIClient().post(BATCH_URL, {}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_mixed_batch(self):
+        """Test creates, updates and deletes are applied together."""
+        updated = create_post(self.user, title='Old title')
+        deleted = create_post(self.user)
+        operations = [
+            {'op': 'create', 'data': {
+                'title': 'New', 'content': 'Post', 'tags': [{'name': 'A'}]}},
+            {'op': 'update', 'id': updated.id, 'data': {'title': 'Renamed'}},
+            {'op': 'delete', 'id': deleted.id},
+        ]
+
+        res = self._batch(operations)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data['results']  # type: ignore
+        self.assertEqual(
+            [r['status'] for r in results], [201, 200, 204])
+        created = Post.objects.get(id=results[0]['id'])
+        self.assertEqual(created.user, self.user)
+        self.assertEqual(
+            list(created.tags.values_list('name', flat=True)), ['A'])
+        self.assertEqual(results[0]['data']['title'], 'New')
+        updated.refresh_from_db()
+        self.assertEqual(updated.title, 'Renamed')
+        self.assertEqual(updated.content, 'Sample content')
+        self.assertEqual(results[1]['data']['title'], 'Renamed')
+        self.assertFalse(Post.objects.filter(id=deleted.id).exists())
+
+    def test_update_tags_applies_delta(self):
+        """Test tag changes in a batch touch only the changed links."""
+        keep = Tag.objects.create(user=self.user, name='Keep')
+        drop = Tag.objects.create(user=self.user, name='Drop')
+        post = create_post(self.user)
+        post.tags.add(keep, drop)
+        kept_row = Post.tags.through.objects.get(post=post, tag=keep).id
+
+        res = self._batch([{'op': 'update', 'id': post.id, 'data': {
+            'tags': [{'name': 'Keep'}, {'name': 'Add'}]}}])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(post.tags.values_list('name', flat=True)), ['Add', 'Keep'])
+        self.assertTrue(
+            Post.tags.through.objects.filter(id=kept_row).exists())
+
+    def test_tags_resolved_once(self):
+        """Test batch cost does not grow with operations or tags."""
+        def run(count):
+            operations = [
+                {'op': 'create', 'data': {
+                    'title': f'Post {i}', 'content': 'Content',
+                    'tags': [{'name': f'Tag {i % 3}'}, {'name': 'Shared'}],
+                }}
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                res = self._batch(operations)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(run(2), run(50))
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 4)
+
+    def test_invalid_operation_applies_nothing(self):
+        """Test one invalid operation rejects the whole batch."""
+        post = create_post(self.user)
+        other_post = create_post(create_user(email='other@example.com'))
+        operations = [
+            {'op': 'create', 'data': {'title': 'New', 'content': 'Post'}},
+            {'op': 'delete', 'id': post.id},
+            {'op': 'create', 'data': {'title': 'No content'}},
+            {'op': 'update', 'id': other_post.id, 'data': {'title': 'X'}},
+        ]
+
+        res = self._batch(operations)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = res.data['operations']  # type: ignore
+        self.assertEqual(errors[0], {})
+        self.assertEqual(errors[1], {})
+        self.assertIn('content', errors[2]['data'])
+        self.assertIn('id', errors[3])
+        self.assertTrue(Post.objects.filter(id=post.id).exists())
+        self.assertEqual(Post.objects.filter(user=self.user).count(), 1)
+
+    def test_repeated_post_rejected(self):
+        """Test a post may only be targeted once per batch."""
+        post = create_post(self.user)
+
+        res = self._batch([
+            {'op': 'update', 'id': post.id, 'data': {'title': 'X'}},
+            {'op': 'delete', 'id': post.id},
+        ])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Post.objects.filter(id=post.id).exists())
+
+    def test_missing_id_rejected(self):
+        """Test update and delete operations need an id."""
+        res = self._batch([{'op': 'delete'}])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', res.data['operations'][0])  # type: ignore
+
+    def test_too_many_operations_rejected(self):
+        """Test batches over the size limit are rejected."""
+        operation = {'op': 'create', 'data': {'title': 'T', 'content': 'C'}}
+
+        limit = PostBatchSerializer().fields['operations'].max_length
+        res = self._batch([operation] * (limit + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.exists())
@@ -1,19 +1,31 @@
 """
 Test Post APIs
 """
+import hashlib
 import os
+import shutil
 import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import Post, Tag
 
+from post.images import VARIANTS, process_post_image
+from post.pagination import PostCursorPagination
+from post.queries import optimize_post_queryset
 from post.serializers import PostSerializer, PostDetailSerializer
+from post.uploads import BoundedUploadHandler, UploadTooLarge
 
 
 POST_URL = reverse('post:post-list')
@@ -80,7 +92,7 @@ class PrivatePostApiTests(TestCase):
         serializer = PostSerializer(posts, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(serializer.data, res.data)  # type: ignore
+        self.assertEqual(serializer.data, res.data['results'])  # type: ignore
 
     def test_post_list_limited_to_user(self):
         """Test list of post is limited to authenticated user"""
@@ -96,7 +108,7 @@ class PrivatePostApiTests(TestCase):
         posts = Post.objects.filter(user=self.user)
         serializer = PostSerializer(posts, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)  # type: ignore
+        self.assertEqual(res.data['results'], serializer.data)  # type: ignore
 
     def test_get_post_detail(self):
         """Test get post detail"""
@@ -293,35 +305,509 @@ class PrivatePostApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(post.tags.count(), 0)
 
+    def test_create_post_tag_queries_constant(self):
+        """Test tag resolution cost does not grow with tag count."""
+        Tag.objects.create(user=self.user, name='Existing')
+
+        def create_with_tags(count):
+            names = ['Existing'] + [f'New {count} {i}' for i in range(count)]
+            payload = {
+                'title': 'Post Title',
+                'content': 'Post content',
+                'tags': [{'name': name} for name in names],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post(POST_URL, payload, format='json')
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            post = Post.objects.get(id=res.data['id'])  # type: ignore
+            self.assertEqual(post.tags.count(), count + 1)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create_with_tags(1), create_with_tags(20))
+
+    def test_create_post_with_repeated_tag(self):
+        """Test repeating a tag name in the payload creates it once."""
+        payload = {
+            'title': 'Post Title',
+            'content': 'Post content',
+            'tags': [{'name': 'Food'}, {'name': 'Food'}],
+        }
+        res = self.client.post(POST_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name='Food').count(), 1)
+        post = Post.objects.get(id=res.data['id'])  # type: ignore
+        self.assertEqual(post.tags.count(), 1)
+
+    def test_partial_update_writes_changed_columns(self):
+        """Test a title-only update does not rewrite content."""
+        post = create_post(user=self.user)
+
+        url = detail_url(post.id)  # type: ignore
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(url, {'title': 'New title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        updates = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('UPDATE "core_post"')
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"title"', updates[0])
+        self.assertNotIn('"content"', updates[0])
+
+    def test_update_unchanged_tags_no_join_writes(self):
+        """Test resending the same tags leaves the join table alone."""
+        post = create_post(user=self.user)
+        post.tags.add(
+            Tag.objects.create(user=self.user, name='Food'),
+            Tag.objects.create(user=self.user, name='Health'),
+        )
+        payload = {'tags': [{'name': 'Health'}, {'name': 'Food'}]}
+
+        url = detail_url(post.id)  # type: ignore
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        writes = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_update_tags_applies_delta(self):
+        """Test only removed and added tags touch the join table."""
+        keep = Tag.objects.create(user=self.user, name='Keep')
+        drop = Tag.objects.create(user=self.user, name='Drop')
+        post = create_post(user=self.user)
+        post.tags.add(keep, drop)
+        through_id = Post.tags.through.objects.get(post=post, tag=keep).id
+        payload = {'tags': [{'name': 'Keep'}, {'name': 'Add'}]}
+
+        url = detail_url(post.id)  # type: ignore
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(post.tags.values_list('name', flat=True)), ['Add', 'Keep'])
+        self.assertTrue(
+            Post.tags.through.objects.filter(id=through_id).exists())
+
+
+class PostTagFilterTests(TestCase):
+    """Test filtering posts by tags"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.food = Tag.objects.create(user=self.user, name='Food')
+        self.water = Tag.objects.create(user=self.user, name='Water')
+        self.both = create_post(user=self.user)
+        self.both.tags.add(self.food, self.water)
+        self.food_only = create_post(user=self.user)
+        self.food_only.tags.add(self.food)
+        self.untagged = create_post(user=self.user)
+
+    def _filter(self, **params):
+        res = self.client.get(POST_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return {post['id'] for post in res.data['results']}
+
+    def test_filter_any_tag(self):
+        """Test posts with any of the tags are returned"""
+        ids = self._filter(tags=f'{self.food.id},{self.water.id}')
+
+        self.assertEqual(ids, {self.both.id, self.food_only.id})
+
+    def test_filter_all_tags(self):
+        """Test tags_match=all only returns posts with every tag"""
+        ids = self._filter(
+            tags=f'{self.food.id},{self.water.id}', tags_match='all')
+
+        self.assertEqual(ids, {self.both.id})
+
+    def test_filter_single_query(self):
+        """Test filtering runs as one post query plus the tag prefetch"""
+        with self.assertNumQueries(3):  # version stamp, posts, tags
+            self._filter(tags=f'{self.food.id},{self.water.id}',
+                         tags_match='all')
+
+    def test_filter_invalid_tags(self):
+        """Test malformed tag filters are rejected"""
+        res = self.client.get(POST_URL, {'tags': 'food'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(
+            POST_URL, {'tags': self.food.id, 'tags_match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PostPaginationTests(TestCase):
+    """Test cursor pagination of the post list"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def _bulk_create_posts(self, count):
+        """Create count posts for the user in one query"""
+        Post.objects.bulk_create(
+            Post(user=self.user, title=f'Post {i}', content='Content')
+            for i in range(count)
+        )
+
+    def _fetch(self, url, params=None):
+        """Fetch a page and return response with captured queries"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res, ctx.captured_queries
+
+    def test_list_is_paginated(self):
+        """Test list returns one page and a next cursor"""
+        self._bulk_create_posts(5)
+
+        res, _ = self._fetch(POST_URL, {'page_size': 2})
+
+        ids = list(
+            Post.objects.filter(user=self.user)
+            .order_by('-id').values_list('id', flat=True)
+        )
+        self.assertEqual([p['id'] for p in res.data['results']], ids[:2])
+        self.assertIsNotNone(res.data['next'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_follow_cursor_walks_all_posts(self):
+        """Test following next links returns every post once"""
+        self._bulk_create_posts(7)
+
+        seen = []
+        res, _ = self._fetch(POST_URL, {'page_size': 3})
+        seen += [p['id'] for p in res.data['results']]
+        while res.data['next']:
+            res, _ = self._fetch(res.data['next'])
+            seen += [p['id'] for p in res.data['results']]
+
+        ids = list(
+            Post.objects.filter(user=self.user)
+            .order_by('-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, ids)
+
+    def test_page_size_capped(self):
+        """Test page_size above the max limit is clamped"""
+        max_page_size = PostCursorPagination.max_page_size
+        self._bulk_create_posts(max_page_size + 1)
+
+        res, _ = self._fetch(POST_URL, {'page_size': max_page_size + 100})
+
+        self.assertEqual(len(res.data['results']), max_page_size)
+
+    def test_cost_flat_as_table_grows(self):
+        """Test first and deep pages cost the same on small and big tables
+
+        Query count and page SQL stand in for latency: timings at test
+        table sizes are noise. bench_api reports wall-clock percentiles
+        on seeded data.
+        """
+        params = {'page_size': 5}
+        self._bulk_create_posts(10)
+        _, small_first = self._fetch(POST_URL, params)
+
+        self._bulk_create_posts(500)
+        res, big_first = self._fetch(POST_URL, params)
+        for _ in range(50):
+            res, big_deep = self._fetch(res.data['next'])
+
+        self.assertEqual(len(small_first), len(big_first))
+        self.assertEqual(len(big_first), len(big_deep))
+        page_sql = [
+            q['sql'] for q in big_deep if 'FROM "core_post"' in q['sql']
+        ][0]
+        self.assertIn('LIMIT 6', page_sql)
+        self.assertNotIn('OFFSET', page_sql)
+        self.assertIn('"core_post"."id" <', page_sql)
+
+
+class PostQueryCountTests(TestCase):
+    """Test post serialization runs a constant number of queries"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.tags = Tag.objects.bulk_create(
+            Tag(user=self.user, name=f'Tag {i}') for i in range(3)
+        )
+
+    def _grow_to(self, count):
+        """Top the user's posts up to count, each with every tag"""
+        existing = Post.objects.filter(user=self.user).count()
+        posts = Post.objects.bulk_create(
+            Post(user=self.user, title=f'Post {i}', content='Content')
+            for i in range(existing, count)
+        )
+        Post.tags.through.objects.bulk_create(
+            Post.tags.through(post_id=post.id, tag_id=tag.id)
+            for post in posts for tag in self.tags
+        )
+
+    def test_list_query_count_constant(self):
+        """Test listing posts costs three queries at any size"""
+        for count in (1, 100, 1000):
+            with self.subTest(count=count):
+                self._grow_to(count)
+
+                # version stamp, posts, tags
+                with self.assertNumQueries(3):
+                    res = self.client.get(POST_URL, {'page_size': 500})
+
+                self.assertEqual(len(res.data['results']), min(count, 500))
+                for post in res.data['results']:
+                    self.assertEqual(len(post['tags']), 3)
+
+    def test_serializer_query_count_constant(self):
+        """Test serializing every post costs two queries at any size"""
+        for count in (1, 100, 1000):
+            with self.subTest(count=count):
+                self._grow_to(count)
+                posts = optimize_post_queryset(
+                    Post.objects.filter(user=self.user), PostSerializer)
+
+                with self.assertNumQueries(2):
+                    data = PostSerializer(posts, many=True).data
 
+                self.assertEqual(len(data), count)
+
+    def test_detail_query_count(self):
+        """Test retrieving a post costs two queries"""
+        self._grow_to(1)
+        post = Post.objects.get(user=self.user)
+
+        with self.assertNumQueries(2):
+            res = self.client.get(detail_url(post.id))  # type: ignore
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 3)  # type: ignore
+
+    def test_list_selects_only_serialized_columns(self):
+        """Test list query does not load unused columns"""
+        self._grow_to(1)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(POST_URL)
+
+        post_sql = ctx.captured_queries[1]['sql']
+        self.assertIn('"core_post"."title"', post_sql)
+        self.assertNotIn('"core_post"."image"', post_sql)
+        self.assertNotIn('"core_post"."updated_at"', post_sql)
+
+
+class PostSearchTests(TestCase):
+    """Test full-text search over posts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+
+    def _search(self, term, **params):
+        res = self.client.get(POST_URL, {'search': term, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_search_matches_title_and_content(self):
+        """Test search finds words in title or content"""
+        by_title = Post.objects.create(
+            user=self.user, title='Flooded roads', content='Stay home')
+        by_content = Post.objects.create(
+            user=self.user, title='Warning', content='The road is closed')
+        Post.objects.create(user=self.user, title='Bakery', content='Bread')
+
+        res = self._search('road')
+
+        ids = {post['id'] for post in res.data['results']}
+        self.assertEqual(ids, {by_title.id, by_content.id})  # type: ignore
+
+    def test_search_ranks_title_matches_first(self):
+        """Test title matches outrank content matches"""
+        by_content = Post.objects.create(
+            user=self.user, title='Warning', content='Water in the street')
+        by_title = Post.objects.create(
+            user=self.user, title='Water outage', content='No supply')
+
+        res = self._search('water')
+
+        ids = [post['id'] for post in res.data['results']]
+        self.assertEqual(ids, [by_title.id, by_content.id])  # type: ignore
+
+    def test_search_limited_to_user(self):
+        """Test search only returns the user's posts"""
+        other_user = create_user(email='other@example.com', password='pw123')
+        Post.objects.create(user=other_user, title='Fire', content='Smoke')
+
+        res = self._search('fire')
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_search_sees_updated_text(self):
+        """Test edits are searchable immediately"""
+        post = create_post(user=self.user)
+
+        url = detail_url(post.id)  # type: ignore
+        self.client.patch(url, {'title': 'Lost kitten'})
+        res = self._search('kitten')
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(self._search('title').data['results'], [])
+
+    def test_search_paginated(self):
+        """Test search results are paginated by page number"""
+        Post.objects.bulk_create(
+            Post(user=self.user, title=f'Help {i}', content='Needed')
+            for i in range(5)
+        )
+
+        first = self._search('help', page_size=2)
+        last = self._search('help', page_size=2, page=3)
+
+        self.assertEqual(first.data['count'], 5)
+        self.assertEqual(len(first.data['results']), 2)
+        self.assertEqual(len(last.data['results']), 1)
+        self.assertIsNone(last.data['next'])
+
+
+class PostSparseFieldsetTests(TestCase):
+    """Test ?fields= and ?expand= on post reads"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com', password='test123')
+        self.client.force_authenticate(self.user)
+        self.post = create_post(self.user)
+        self.post.tags.add(Tag.objects.create(user=self.user, name='Food'))
+
+    def _get(self, url, params):
+        """Fetch url and return response with the post query"""
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        post_sql = [
+            q['sql'] for q in ctx.captured_queries
+            if q['sql'].startswith('SELECT "core_post"')
+        ]
+        return res, post_sql[0], ctx.captured_queries
+
+    def test_list_fields_projects_columns(self):
+        """Test list only selects and returns the requested fields"""
+        res, post_sql, queries = self._get(POST_URL, {'fields': 'id,title'})
+
+        self.assertEqual(list(res.data['results'][0]), ['id', 'title'])
+        self.assertNotIn('"core_post"."content"', post_sql)
+        self.assertEqual(len(queries), 2)  # version stamp, posts
+
+    def test_list_expand_tags(self):
+        """Test expand adds tags to a sparse fieldset"""
+        res, post_sql, queries = self._get(
+            POST_URL, {'fields': 'title', 'expand': 'tags'})
+
+        self.assertEqual(list(res.data['results'][0]), ['title', 'tags'])
+        self.assertEqual(res.data['results'][0]['tags'][0]['name'], 'Food')
+        self.assertNotIn('"core_post"."content"', post_sql)
+        self.assertEqual(len(queries), 3)
+
+    def test_retrieve_fields(self):
+        """Test detail only selects and returns the requested fields"""
+        url = detail_url(self.post.id)  # type: ignore
+        res, post_sql, queries = self._get(url, {'fields': 'id,updated_at'})
+
+        self.assertEqual(list(res.data), ['id', 'updated_at'])
+        self.assertIn('"core_post"."updated_at"', post_sql)
+        self.assertNotIn('"core_post"."content"', post_sql)
+        self.assertNotIn('"core_post"."created_at"', post_sql)
+        self.assertEqual(len(queries), 1)
+
+    def test_unknown_fields_rejected(self):
+        """Test unknown fields and expansions are rejected"""
+        for params in ({'fields': 'id,secret'}, {'expand': 'user'}):
+            with self.subTest(params=params):
+                res = self.client.get(POST_URL, params)
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_fields_ignored_on_write(self):
+        """Test writes always return the full post"""
+        url = detail_url(self.post.id)  # type: ignore
+        res = self.client.patch(f'{url}?fields=id', {'title': 'New'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New')  # type: ignore
+
+
+@override_settings(BACKGROUND_WORKERS=0)
 class ImageUplaodTests(TestCase):
     """Test for the image upload API"""
 
     def setUp(self):
+        # Stored images are shared between posts, so each test gets its
+        # own media directory, removed with whatever the test stored.
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_GRACE_SECONDS=0)
+        self.media_settings.enable()
+
         self.client = APIClient()
         self.user = create_user(email='test@example.com', password='test123')
         self.client.force_authenticate(self.user)
         self.post = create_post(self.user)
 
     def tearDown(self):
-        self.post.image.delete()
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
 
-    def test_upload_image(self):
-        """Test uploading image to a post"""
-        url = image_upload_url(self.post.id)  # type: ignore
+    def _upload(self, size=(10, 10), post=None):
+        """Upload a JPEG carrying EXIF data and return the response"""
+        post = post or self.post
+        url = image_upload_url(post.id)  # type: ignore
+        exif = Image.Exif()
+        exif[0x010f] = 'Test Camera'
 
         with tempfile.NamedTemporaryFile(suffix='.jpg') as img_file:
-            img = Image.new('RGB', (10, 10))
-            img.save(img_file, format='JPEG')
+            img = Image.new('RGB', size)
+            img.save(img_file, format='JPEG', exif=exif)
             img_file.seek(0)
             payload = {'image': img_file}
-            res = self.client.post(url, payload, format='multipart')
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(url, payload, format='multipart')
+
+        post.refresh_from_db()
+        return res
+
+    def test_upload_image(self):
+        """Test uploading image to a post"""
+        res = self._upload()
 
-        self.post.refresh_from_db()
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn('image', res.data)  # type: ignore
         self.assertTrue(os.path.exists(self.post.image.path))
 
+    def test_same_image_stored_once(self):
+        """Test posts uploading the same image share one file"""
+        other = create_post(self.user)
+        self._upload(size=(400, 200))
+
+        self._upload(size=(400, 200), post=other)
+
+        self.assertEqual(other.image.name, self.post.image.name)
+        self.assertEqual(
+            other.image_thumbnail.name, self.post.image_thumbnail.name)
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(self.post.image.path))), 3)
+
     def test_upload_image_bad_request(self):
         """Test uploading a invalid image"""
         url = image_upload_url(self.post.id)  # type: ignore
@@ -329,3 +815,121 @@ class ImageUplaodTests(TestCase):
         res = self.client.post(url, payload, format='multipart')
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=2048)
+    def test_upload_too_large_rejected(self):
+        """Test uploads over the byte limit are refused with 413"""
+        url = image_upload_url(self.post.id)  # type: ignore
+        with tempfile.NamedTemporaryFile(suffix='.png') as img_file:
+            Image.effect_noise((64, 64), 100).save(img_file, format='PNG')
+            img_file.seek(0)
+            res = self.client.post(
+                url, {'image': img_file}, format='multipart')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=99)
+    def test_upload_too_many_pixels_rejected(self):
+        """Test images over the pixel limit are refused"""
+        res = self._upload(size=(10, 10))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)  # type: ignore
+        self.assertFalse(self.post.image)
+
+    def test_upload_unsupported_format_rejected(self):
+        """Test images outside the allowed formats are refused"""
+        url = image_upload_url(self.post.id)  # type: ignore
+        with tempfile.NamedTemporaryFile(suffix='.bmp') as img_file:
+            Image.new('RGB', (10, 10)).save(img_file, format='BMP')
+            img_file.seek(0)
+            res = self.client.post(
+                url, {'image': img_file}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_image_creates_variants(self):
+        """Test upload produces small WebP variants without EXIF"""
+        self._upload(size=(2000, 1000))
+
+        for field, bounds in VARIANTS.items():
+            with self.subTest(field=field):
+                variant = getattr(self.post, field)
+                with Image.open(variant.path) as img:
+                    self.assertEqual(img.format, 'WEBP')
+                    self.assertLessEqual(img.width, bounds[0])
+                    self.assertLessEqual(img.height, bounds[1])
+                    self.assertEqual(img.width, 2 * img.height)
+                    self.assertNotIn('exif', img.info)
+
+    def test_list_exposes_variant_urls(self):
+        """Test post list links the thumbnail and medium variants"""
+        self._upload()
+
+        res = self.client.get(POST_URL)
+
+        post = res.data['results'][0]  # type: ignore
+        self.assertTrue(post['image_thumbnail'].endswith(
+            self.post.image_thumbnail.url))
+        self.assertTrue(post['image_medium'].endswith(
+            self.post.image_medium.url))
+
+    def test_replacing_image_clears_variants(self):
+        """Test variants of a replaced image are not served"""
+        self._upload()
+
+        with patch('post.views.schedule_post_image_processing'):
+            self._upload()
+
+        self.assertFalse(self.post.image_thumbnail)
+        self.assertFalse(self.post.image_medium)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000)
+    def test_handler_checks_pixels_before_body_arrives(self):
+        """Test the pixel limit fails on the first chunk of a big image"""
+        buffer = BytesIO()
+        Image.effect_noise((400, 400), 100).save(buffer, format='PNG')
+        data = buffer.getvalue()
+        handler = BoundedUploadHandler()
+        handler.new_file('image', 'big.png', 'image/png', len(data))
+
+        with self.assertRaises(ValidationError):
+            handler.receive_data_chunk(data[:4096], 0)
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_handler_rejects_oversized_content_length(self):
+        """Test requests declaring too large a body are refused unread"""
+        handler = BoundedUploadHandler()
+
+        with self.assertRaises(UploadTooLarge):
+            handler.handle_raw_input(
+                BytesIO(), {}, 10 * 1024 * 1024, b'boundary')
+
+    def test_handler_streams_to_disk(self):
+        """Test even small uploads are written to a temporary file"""
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='PNG')
+        data = buffer.getvalue()
+        handler = BoundedUploadHandler()
+        handler.new_file('image', 'small.png', 'image/png', len(data))
+
+        handler.receive_data_chunk(data, 0)
+        uploaded = handler.file_complete(len(data))
+
+        self.assertTrue(os.path.exists(uploaded.temporary_file_path()))
+        self.assertEqual(
+            uploaded.content_sha256, hashlib.sha256(data).hexdigest())
+        uploaded.close()
+
+    def test_processing_skips_replaced_image(self):
+        """Test a stale processing job does not attach variants"""
+        with patch('post.views.schedule_post_image_processing'):
+            self._upload()
+
+        process_post_image(self.post.id, 'uploads/post/old.jpg')
+
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image_thumbnail)
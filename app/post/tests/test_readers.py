@@ -0,0 +1,156 @@
+"""
+Tests for the values() list reader and the orjson renderer.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from core.renderers import ORJSONRenderer
+
+from post.queries import optimize_post_queryset
+from post.readers import ListReader
+from post.serializers import PostDetailSerializer, PostSerializer
+
+
+POST_URL = reverse('post:post-list')
+TAGS_URL = reverse('post:tag-list')
+
+
+def create_user(email='user@example.com', password='testpass123'):
+    """Create and return a user."""
+    return get_user_model().objects.create_user(email=email, password=password)  # type: ignore # noqa
+
+
+class ListReaderTests(TestCase):
+    """Test the reader renders the same bytes as the serializers."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        food = Tag.objects.create(user=self.user, name='Food')
+        drink = Tag.objects.create(user=self.user, name='Drink \u2028 Ünï')
+        for i in range(5):
+            post = Post.objects.create(
+                user=self.user,
+                title=f'Post {i} \u2029 ☕',
+                content='Line one\nLine "two"',
+            )
+            post.tags.add(*[food, drink][:i % 3])
+        Post.objects.filter(title__startswith='Post 1').update(
+            image='uploads/post/original.jpg',
+            image_thumbnail='uploads/post/thumb.webp',
+            image_medium='uploads/post/medium.webp',
+        )
+
+    def _assert_identical(self, url, params=None):
+        """Assert url renders the same with and without the reader."""
+        fast = self.client.get(url, params)
+        with patch.object(ListReader, 'compile', return_value=None):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_post_list_identical(self):
+        """Test post list pages match the serializer byte for byte."""
+        res = self._assert_identical(POST_URL, {'page_size': 2})
+        self._assert_identical(res.data['next'])
+
+    def test_post_search_identical(self):
+        """Test ranked search results match the serializer."""
+        self._assert_identical(POST_URL, {'search': 'line'})
+
+    def test_tag_list_identical(self):
+        """Test tag list matches the serializer byte for byte."""
+        self._assert_identical(TAGS_URL)
+
+    def test_reader_query_count(self):
+        """Test the reader loads rows and tags in one query each."""
+        reader = ListReader.compile(PostSerializer())
+        rows = reader.values(Post.objects.order_by('id'))
+
+        with self.assertNumQueries(2):
+            data = reader.read(rows)
+
+        posts = optimize_post_queryset(
+            Post.objects.order_by('id'), PostSerializer)
+        self.assertEqual(data, PostSerializer(posts, many=True).data)
+
+    def test_unsupported_serializer_falls_back(self):
+        """Test serializers with other field types are not compiled."""
+        class CustomSerializer(PostSerializer):
+            def to_representation(self, instance):
+                return {}
+
+        self.assertIsNone(ListReader.compile(PostDetailSerializer()))
+        self.assertIsNone(ListReader.compile(CustomSerializer()))
+
+
+class ORJSONRendererTests(TestCase):
+    """Test the orjson renderer matches JSONRenderer."""
+
+    def test_same_bytes(self):
+        """Test rendering common payloads gives identical bytes."""
+        data = {
+            'results': serializers.ReturnList([
+                {'id': 1, 'text': 'ünï \u2028 \u2029 "quoted"', 'none': None},
+            ], serializer=None),
+            'at': datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            'price': Decimal('1.50'),
+            'flags': [True, False],
+        }
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_numbers_and_keys_same_bytes(self):
+        """Test float and Decimal fields and non-str keys match."""
+
+        class NumberSerializer(serializers.Serializer):
+            ratio = serializers.FloatField()
+            price = serializers.DecimalField(max_digits=8, decimal_places=2)
+            weight = serializers.DecimalField(
+                max_digits=8, decimal_places=3, coerce_to_string=False)
+
+        data = {
+            'results': NumberSerializer([
+                {'ratio': 0.1, 'price': Decimal('1.5'), 'weight': 2},
+                {'ratio': -2.5, 'price': 0, 'weight': Decimal('0.125')},
+                {'ratio': 123456.789, 'price': 10, 'weight': 1},
+            ], many=True).data,
+            'counts': {1: 'one', 2.5: 'two and a half', None: 'none'},
+        }
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_exponent_floats_differ(self):
+        """Test floats in exponent form keep their value, not their bytes."""
+        data = {'big': 1e16, 'small': 1e-7}
+
+        self.assertEqual(ORJSONRenderer().render(data),
+                         b'{"big":1e16,"small":1e-7}')
+        self.assertEqual(JSONRenderer().render(data),
+                         b'{"big":1e+16,"small":1e-07}')
+
+    def test_indent_uses_json(self):
+        """Test indented output is left to JSONRenderer."""
+        data = {'a': [1, 2]}
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
@@ -2,18 +2,21 @@
 Tests for the tags API.
 """
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Post, Tag
 
 from post.serializers import TagSerializer
 
 
 TAGS_URL = reverse('post:tag-list')
+TAG_STATS_URL = reverse('post:tag-stats')
 
 
 def detail_url(tag_id):
@@ -84,6 +87,18 @@ class PrivateTagsApiTests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload['name'])
 
+    def test_update_tag_to_taken_name_error(self):
+        """Test renaming a tag to an existing name returns an error."""
+        Tag.objects.create(user=self.user, name='Dessert')
+        tag = Tag.objects.create(user=self.user, name='After Dinner')
+
+        url = detail_url(tag.id)  # type: ignore
+        res = self.client.patch(url, {'name': 'Dessert'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, 'After Dinner')
+
     def test_delete_tag(self):
         """Test deleting a tag."""
         tag = Tag.objects.create(user=self.user, name='Breakfast')
@@ -94,3 +109,58 @@ class PrivateTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         tags = Tag.objects.filter(user=self.user)
         self.assertFalse(tags.exists())
+
+    def test_list_tag_fields(self):
+        """Test ?fields= trims the tag list."""
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL, {'fields': 'name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'name': 'Vegan'}])  # type: ignore
+
+    def _tag_posts(self, **counts):
+        """Create tags named after counts with that many posts each."""
+        for name, count in counts.items():
+            tag = Tag.objects.create(user=self.user, name=name)
+            for _ in range(count):
+                post = Post.objects.create(
+                    user=self.user, title='Title', content='Content')
+                post.tags.add(tag)
+
+    def test_tag_stats(self):
+        """Test tag stats list tags by number of posts."""
+        self._tag_posts(Cake=1, Bread=2, Apple=1, Tea=0)
+        other = create_user(email='other@example.com')
+        Tag.objects.create(user=other, name='Other')
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(TAG_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [  # type: ignore
+            {'id': Tag.objects.get(name=name).id, 'name': name,
+             'post_count': count}
+            for name, count in [
+                ('Bread', 2), ('Apple', 1), ('Cake', 1), ('Tea', 0)]
+        ])
+        # The counters are read, not computed from the link table.
+        self.assertFalse(any(
+            'core_post_tags' in query['sql']
+            for query in ctx.captured_queries))
+
+    def test_tag_stats_limit(self):
+        """Test ?limit= returns the most used tags."""
+        self._tag_posts(Cake=1, Bread=2, Apple=3)
+
+        res = self.client.get(TAG_STATS_URL, {'limit': 2})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Apple', 'Bread'])
+
+    def test_tag_stats_invalid_limit(self):
+        """Test a limit that is not a positive integer is rejected."""
+        for limit in ('0', 'many'):
+            res = self.client.get(TAG_STATS_URL, {'limit': limit})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
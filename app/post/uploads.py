@@ -0,0 +1,124 @@
+"""
+Bounded, streaming handling of post image uploads.
+"""
+import hashlib
+
+from PIL import Image, UnidentifiedImageError
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+
+ALLOWED_IMAGE_FORMATS = {'JPEG', 'PNG', 'GIF', 'WEBP'}
+# Room for multipart boundaries and part headers around the image.
+MULTIPART_OVERHEAD = 64 * 1024
+# How much of an upload to buffer before giving up on reading the header
+# early; large EXIF blocks can push a JPEG's size marker back this far.
+HEADER_PROBE_BYTES = 256 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Upload exceeds the maximum allowed size.'
+    default_code = 'upload_too_large'
+
+
+def read_image_header(file):
+    """Return (format, (width, height)) without decoding pixel data."""
+    file.seek(0)
+    try:
+        # Image.open only parses the header; pixels load lazily.
+        with Image.open(file) as image:
+            return image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return None, None
+    finally:
+        file.seek(0)
+
+
+def check_image_header(image_format, size):
+    """Raise a ValidationError for images the API does not accept."""
+    if image_format not in ALLOWED_IMAGE_FORMATS:
+        raise serializers.ValidationError(
+            'Upload a valid JPEG, PNG, GIF or WebP image.')
+    width, height = size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise serializers.ValidationError(
+            f'Image has {width * height} pixels, the maximum is '
+            f'{settings.POST_IMAGE_MAX_PIXELS}.')
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads straight to a temporary file within the size limit.
+
+    Nothing is buffered in memory. Requests are rejected up front when
+    Content-Length is already too big, and image dimensions are checked
+    as soon as the header has arrived instead of after the whole body.
+    The file is hashed as it arrives for core.storage to name it by.
+    """
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or settings.POST_IMAGE_MAX_BYTES
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header_checked = False
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        received = start + len(raw_data)
+        if received > self.max_bytes:
+            self.upload_interrupted()
+            raise UploadTooLarge()
+
+        self.file.write(raw_data)
+        self.sha256.update(raw_data)
+        if not self.header_checked:
+            self._check_header(received)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_sha256 = self.sha256.hexdigest()
+        return file
+
+    def _check_header(self, received):
+        self.file.flush()
+        with open(self.file.temporary_file_path(), 'rb') as partial:
+            image_format, size = read_image_header(partial)
+
+        if image_format is None and received < HEADER_PROBE_BYTES:
+            return  # Header not complete yet, try again on the next chunk.
+        # Unreadable headers are left to the serializer to report.
+        self.header_checked = True
+        if image_format is not None:
+            try:
+                check_image_header(image_format, size)
+            except serializers.ValidationError as exc:
+                self.upload_interrupted()
+                raise serializers.ValidationError(
+                    {self.field_name: exc.detail})
+
+
+class HeaderValidatedImageField(serializers.ImageField):
+    """Image field validated from the file header alone.
+
+    The stock ImageField hands the file to Pillow's verify(), copying
+    in-memory uploads and reading the whole stream.
+    """
+
+    def to_internal_value(self, data):
+        file = serializers.FileField.to_internal_value(self, data)
+        image_format, size = read_image_header(file)
+        if image_format is None:
+            self.fail('invalid_image')
+        check_image_header(image_format, size)
+        return file
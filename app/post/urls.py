@@ -5,7 +5,7 @@ Url mapping for Post API
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from post import views
+from post import async_views, views
 
 router = DefaultRouter()
 router.register('post', views.PostViewSet)
@@ -13,5 +13,13 @@ router.register('tag', views.TagViewSet)
 
 app_name = 'post'
 urlpatterns = [
-    path('', include(router.urls))
+    path('feed/', views.FeedView.as_view(), name='feed'),
+    path('', include(router.urls)),
+    path('async/post/', async_views.post_list, name='async-post-list'),
+    path(
+        'async/post/<int:pk>/',
+        async_views.post_detail,
+        name='async-post-detail',
+    ),
+    path('async/tag/', async_views.tag_list, name='async-tag-list'),
 ]
@@ -1,25 +1,149 @@
 """Views for Post API"""
+from drf_spectacular.utils import (  # type: ignore
+    extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes
+    )
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import Count, F
 
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework import viewsets, mixins, status
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from rest_framework import generics, viewsets, mixins, status
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 
 from post import serializers
+from post.batch import PostBatchSerializer, PostBatchResponseSerializer
+from post.conditional import ConditionalListMixin
+from post.feed import (
+    feed_post_ids, schedule_fan_out, schedule_fan_out_removal)
+from post.fieldsets import SparseFieldsetMixin
+from post.images import schedule_post_image_processing
+from post.media import media_post_exists, media_response
+from post.pagination import (
+    FeedCursorPagination, PostCursorPagination, PostSearchPagination)
+from post.queries import optimize_post_queryset
+from post.readers import ValuesListMixin
+from post.uploads import BoundedUploadHandler
 
 from core.models import Post, Tag
+from user.authentication import CachedTokenAuthentication
+
 
+FIELDS_PARAMETER = OpenApiParameter(
+    'fields',
+    OpenApiTypes.STR,
+    description='Comma separated list of fields to return.',
+)
+EXPAND_PARAMETER = OpenApiParameter(
+    'expand',
+    OpenApiTypes.STR,
+    enum=['tags'],
+    description='Related objects to include alongside ?fields=.',
+)
 
-class PostViewSet(viewsets.ModelViewSet):
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            FIELDS_PARAMETER,
+            EXPAND_PARAMETER,
+            OpenApiParameter(
+                'search',
+                OpenApiTypes.STR,
+                description='Words to match in title and content. Results '
+                            'are ranked and paginated by page number.',
+            ),
+            OpenApiParameter(
+                'tags',
+                OpenApiTypes.STR,
+                description='Comma separated list of tag IDs to filter.',
+            ),
+            OpenApiParameter(
+                'tags_match',
+                OpenApiTypes.STR,
+                enum=['any', 'all'],
+                description='Whether posts need any (default) or all of '
+                            'the tags.',
+            ),
+        ]
+    ),
+    retrieve=extend_schema(parameters=[FIELDS_PARAMETER, EXPAND_PARAMETER]),
+)
+class PostViewSet(ConditionalListMixin, ValuesListMixin, SparseFieldsetMixin,
+                  viewsets.ModelViewSet):
     """Handles Post CRUD"""
     serializer_class = serializers.PostDetailSerializer
     queryset = Post.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = PostCursorPagination
+    expandable_fields = ['tags']
+
+    def _params_to_ints(self, qs):
+        """Convert a comma separated list of IDs to integers."""
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(
+                {'tags': 'Expected a comma separated list of IDs.'})
+
+    def _filter_tags(self, queryset):
+        """Semi-join the posts carrying ?tags= through the join table."""
+        tags = self.request.query_params.get('tags')
+        if not tags:
+            return queryset
+
+        tag_ids = set(self._params_to_ints(tags))
+        match = self.request.query_params.get('tags_match', 'any')
+        tagged = Post.tags.through.objects.filter(tag_id__in=tag_ids)
+        if match == 'all':
+            tagged = tagged.values('post_id').annotate(
+                matched=Count('tag_id'),
+            ).filter(matched=len(tag_ids))
+        elif match != 'any':
+            raise ValidationError({'tags_match': 'Expected any or all.'})
+
+        return queryset.filter(id__in=tagged.values('post_id'))
+
+    def _search_query(self):
+        """Return the full-text query for ?search= on list, if any."""
+        search = self.request.query_params.get('search', '').strip()
+        if self.action == 'list' and search:
+            return SearchQuery(
+                search, config='english', search_type='websearch')
+        return None
+
+    @property
+    def paginator(self):
+        """Page ranked search results by number, everything else by id."""
+        if not hasattr(self, '_paginator'):
+            if self._search_query() is not None:
+                self._paginator = PostSearchPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by('-id')
+        """Filter queryset to authenticated user."""
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action == 'list':
+            queryset = self._filter_tags(queryset)
+
+        query = self._search_query()
+        if query is not None:
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=SearchRank(F('search_vector'), query),
+            ).order_by('-rank', '-id')
+        else:
+            queryset = queryset.order_by('-id')
+
+        return optimize_post_queryset(
+            queryset,
+            self.get_serializer_class(),
+            defer=self.request.method in SAFE_METHODS,
+            fields=self.get_sparse_fields(),
+        )
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
@@ -27,32 +151,130 @@ class PostViewSet(viewsets.ModelViewSet):
             return serializers.PostSerializer
         elif self.action == 'upload_image':
             return serializers.PostImageSerializer
+        elif self.action == 'batch':
+            return PostBatchSerializer
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new post"""
-        serializer.save(user=self.request.user)
+        post = serializer.save(user=self.request.user)
+        schedule_fan_out([post.id])
+
+    def perform_destroy(self, instance):
+        """Delete a post and its timeline entries"""
+        schedule_fan_out_removal([instance.id])
+        instance.delete()
 
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Upload an image to post"""
+        request.upload_handlers = [BoundedUploadHandler(request)]
         post = self.get_object()
         serializer = self.get_serializer(post, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            post = serializer.save()
+            schedule_post_image_processing(post)
             return Response(serializer.data, status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(responses=PostBatchResponseSerializer)
+    @action(methods=['POST'], detail=False, url_path='batch')
+    def batch(self, request):
+        """Apply create, update and delete operations in one transaction"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response({'results': results}, status.HTTP_200_OK)
 
-class TagViewSet(mixins.DestroyModelMixin, mixins.UpdateModelMixin,
+
+@extend_schema_view(list=extend_schema(parameters=[FIELDS_PARAMETER]))
+class TagViewSet(ConditionalListMixin, ValuesListMixin, SparseFieldsetMixin,
+                 mixins.DestroyModelMixin, mixins.UpdateModelMixin,
                  mixins.ListModelMixin, viewsets.GenericViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def _limit(self):
+        """Return ?limit= as a positive integer, or None."""
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return None
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            raise ValidationError({'limit': 'Expected a positive integer.'})
+        return limit
+
     def get_queryset(self):
         """Filter queryset to authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action != 'stats':
+            return queryset.order_by('-name')
+
+        # Reads the trigger maintained counters through their index.
+        queryset = queryset.order_by('-post_count', 'name')
+        limit = self._limit()
+        return queryset[:limit] if limit else queryset
+
+    def get_serializer_class(self):
+        """Return the serializer class for request."""
+        if self.action == 'stats':
+            return serializers.TagStatsSerializer
+        return self.serializer_class
+
+    @extend_schema(
+        parameters=[
+            FIELDS_PARAMETER,
+            OpenApiParameter(
+                'limit',
+                OpenApiTypes.INT,
+                description='Return only this many of the most used tags.',
+            ),
+        ],
+        responses=serializers.TagStatsSerializer(many=True),
+    )
+    @action(methods=['GET'], detail=False)
+    def stats(self, request):
+        """List tags with their number of posts, most used first"""
+        return self.list(request)
+
+
+class FeedView(generics.ListAPIView):
+    """List posts of the authenticated user and the users they follow."""
+    serializer_class = serializers.FeedPostSerializer
+    queryset = Post.objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    pagination_class = FeedCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        """Return one page of the feed."""
+        ids = self.paginator.paginate_ids(
+            lambda before, limit: feed_post_ids(request.user, before, limit),
+            request,
+        )
+        posts = optimize_post_queryset(
+            self.get_queryset().filter(id__in=ids).order_by('-id'),
+            self.get_serializer_class(),
+        )
+        serializer = self.get_serializer(posts, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class MediaView(generics.GenericAPIView):
+    """Serve an image of a post of the user or of a user they follow."""
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses={(200, '*/*'): OpenApiTypes.BINARY})
+    def get(self, request, name):
+        """Return the image file."""
+        if not media_post_exists(request.user, name):
+            raise NotFound()
+        return media_response(name)
@@ -0,0 +1,114 @@
+"""
+Authentication for the API.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.db import replica_reads
+
+
+class CacheStats:
+    """Hit and miss counters shared by the threads of a process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        """Count one lookup."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        """Return the current counters."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+
+token_cache_stats = CacheStats()
+
+
+def _token_cache():
+    return caches[settings.AUTH_TOKEN_CACHE]
+
+
+def token_cache_key(key):
+    """Return the cache key for a token, without exposing the token."""
+    return 'auth:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_tokens(*keys):
+    """Drop cached users for the given token keys."""
+    _token_cache().delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token and its user.
+
+    Entries expire after the cache TIMEOUT and are dropped when the token
+    is deleted or its user is saved, see user.signals.
+    """
+
+    def authenticate(self, request):
+        # Set by async views that found the token with aauthenticate_cached.
+        auth = getattr(request, 'cached_token_auth', None)
+        if auth is not None:
+            return auth
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        cache = _token_cache()
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        token_cache_stats.record(hit=token is not None)
+
+        if token is None:
+            # A token created or revoked moments ago may not have reached
+            # the replicas yet; misses are rare enough to ask the primary.
+            with replica_reads(False):
+                user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token)
+
+        return (token.user, token)
+
+    async def aauthenticate_cached(self, request):
+        """Return the cached (user, token) for request, or None.
+
+        For async views: the cache is read through the async cache API,
+        and a miss is left to authenticate(), run alongside the view's
+        other database work. A result stored as the request's
+        cached_token_auth is returned by authenticate() as it is.
+        """
+        header = _TokenHeader()
+        header.keyword = self.keyword
+        key = header.authenticate(request)
+        if key is None:
+            return None
+
+        token = await _token_cache().aget(token_cache_key(key))
+        if token is None:
+            return None
+        token_cache_stats.record(hit=True)
+        return (token.user, token)
+
+
+class _TokenHeader(TokenAuthentication):
+    """Reads the token key from the header as TokenAuthentication does."""
+
+    def authenticate_credentials(self, key):
+        return key
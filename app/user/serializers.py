@@ -7,6 +7,8 @@ from django.contrib.auth import get_user_model, authenticate
 
 from rest_framework import serializers
 
+from core.models import Follow
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Serializer for the user object."""
@@ -32,6 +34,15 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class FollowSerializer(serializers.ModelSerializer):
+    """Serializer for follows."""
+
+    class Meta:
+        model = Follow
+        fields = ['follower', 'followee', 'created_at']
+        read_only_fields = fields
+
+
 class AuthTokenSerializer(serializers.Serializer):
     """Serializer for the user auth token."""
     email = serializers.EmailField()
@@ -56,3 +67,10 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user
         return attrs
+
+
+class TokenCacheStatsSerializer(serializers.Serializer):
+    """Serializer for auth token cache counters."""
+    hits = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    hit_ratio = serializers.FloatField()
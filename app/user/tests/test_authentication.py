@@ -0,0 +1,171 @@
+"""
+Tests for the cached token authentication.
+"""
+from asgiref.sync import async_to_sync
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from user.authentication import CachedTokenAuthentication, token_cache_stats
+
+
+ME_URL = reverse('user:me')
+STATS_URL = reverse('user:token-cache-stats')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)  # type: ignore
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token lookups are cached and invalidated."""
+
+    def setUp(self):
+        caches[settings.AUTH_TOKEN_CACHE].clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_repeat_request_skips_token_query(self):
+        """Test a cached token needs no database lookup."""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)  # type: ignore
+
+    def test_counts_hits_and_misses(self):
+        """Test lookups are reported as hits and misses."""
+        before = token_cache_stats.snapshot()
+
+        self.client.get(ME_URL)
+        self.client.get(ME_URL)
+        self.client.get(ME_URL)
+
+        after = token_cache_stats.snapshot()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 2)
+
+    def test_deleted_token_rejected(self):
+        """Test deleting a token invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.token.delete()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates the cached entry."""
+        self.client.get(ME_URL)
+
+        self.user.is_active = False
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_edited_user_refreshed(self):
+        """Test editing a user is visible on the next request."""
+        self.client.get(ME_URL)
+
+        self.user.name = 'New Name'
+        self.user.save()
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')  # type: ignore
+
+    def test_invalid_token_not_cached(self):
+        """Test a failed lookup is retried against the database."""
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalid')
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_require_staff(self):
+        """Test cache stats are only visible to staff users."""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_for_staff(self):
+        """Test staff users can read cache stats."""
+        self.user.is_staff = True
+        self.user.save()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', res.data)  # type: ignore
+        self.assertIn('misses', res.data)  # type: ignore
+
+
+class AsyncTokenAuthenticationTests(TestCase):
+    """Test the cache-only lookup used by async views."""
+
+    def setUp(self):
+        caches[settings.AUTH_TOKEN_CACHE].clear()
+        self.user = create_user(
+            email='test@example.com', password='testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+        self.lookup = async_to_sync(self.authentication.aauthenticate_cached)
+
+    def _request(self, authorization):
+        return RequestFactory().get('/', HTTP_AUTHORIZATION=authorization)
+
+    def test_cached_token_skips_query(self):
+        """Test a cached token authenticates without the database."""
+        request = self._request(f'Token {self.token.key}')
+        self.assertIsNone(self.lookup(request))
+        self.authentication.authenticate(request)
+
+        with self.assertNumQueries(0):
+            user, token = self.lookup(request)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_authenticate_uses_cached_result(self):
+        """Test authenticate() returns the async lookup without queries."""
+        request = self._request(f'Token {self.token.key}')
+        self.authentication.authenticate(request)
+        request.cached_token_auth = self.lookup(request)
+
+        with self.assertNumQueries(0):
+            user, token = self.authentication.authenticate(
+                Request(request))
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(token, self.token)
+
+    def test_other_schemes_ignored(self):
+        """Test headers for other schemes are left to other classes."""
+        self.assertIsNone(self.lookup(self._request('Basic abc')))
+
+    def test_malformed_header_rejected(self):
+        """Test malformed token headers fail."""
+        for authorization in ('Token', 'Token a b'):
+            with self.subTest(authorization=authorization):
+                with self.assertRaises(AuthenticationFailed):
+                    self.lookup(self._request(authorization))
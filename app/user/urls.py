@@ -12,4 +12,10 @@ urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('<int:pk>/follow/', views.FollowView.as_view(), name='follow'),
+    path(
+        'token-cache-stats/',
+        views.TokenCacheStatsView.as_view(),
+        name='token-cache-stats',
+    ),
 ]
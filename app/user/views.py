@@ -1,11 +1,20 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
+from django.contrib.auth import get_user_model
+
+from rest_framework import generics, authentication, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.settings import api_settings
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 
-from user.serializers import UserSerializer, AuthTokenSerializer
+from core.models import Follow
+from post.feed import schedule_follow, schedule_unfollow
+from user.authentication import CachedTokenAuthentication, token_cache_stats
+from user.serializers import (
+    UserSerializer, AuthTokenSerializer, FollowSerializer,
+    TokenCacheStatsSerializer)
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -22,9 +31,55 @@ class CreateTokenView(ObtainAuthToken):
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
         return self.request.user
+
+
+class FollowView(generics.GenericAPIView):
+    """Follow or unfollow a user, adding their posts to the feed."""
+    serializer_class = FollowSerializer
+    queryset = get_user_model().objects.all()
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        """Follow the user."""
+        followee = self.get_object()
+        if followee.id == request.user.id:
+            raise ValidationError({'followee': 'You cannot follow yourself.'})
+
+        follow, created = Follow.objects.get_or_create(
+            follower=request.user, followee=followee)
+        if created:
+            schedule_follow(request.user.id, followee.id)
+        serializer = self.get_serializer(follow)
+        return Response(
+            serializer.data,
+            status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def delete(self, request, pk):
+        """Stop following the user."""
+        deleted, _ = Follow.objects.filter(
+            follower=request.user, followee_id=pk).delete()
+        if deleted:
+            schedule_unfollow(request.user.id, pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TokenCacheStatsView(generics.GenericAPIView):
+    """Report auth token cache hits and misses for this process."""
+    serializer_class = TokenCacheStatsSerializer
+    authentication_classes = [
+        CachedTokenAuthentication,
+        authentication.SessionAuthentication,
+    ]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """Return the current counters."""
+        serializer = self.get_serializer(token_cache_stats.snapshot())
+        return Response(serializer.data)